@@ -0,0 +1,198 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+
+# Make the application modules importable (they live in src/ and use flat imports)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from gauge import GaugeReader
+from helpers import calculate_psi
+from synthetic import MAX_ANGLE, MAX_PSI, MIN_ANGLE, MIN_PSI, random_gauge
+
+# Parallelism comes from the process pool, avoid oversubscribing cores
+def _init_worker():
+    cv2.setNumThreads(1)
+
+# Render and read one chunk of labelled gauges. Every frame gets a fresh reader
+# so no smoothing or tracking carries over between unrelated images.
+def evaluate_chunk(task):
+
+    seeds, height, width, reader_options = task
+    rows = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        frame, label = random_gauge(rng, height, width)
+
+        reader = GaugeReader(MIN_ANGLE, MAX_ANGLE, MIN_PSI, MAX_PSI, needle_color=label['needle_color'], **reader_options)
+        start = time.perf_counter()
+        _, _, raw_angle = reader.read_frame(frame, annotate=False)
+        elapsed = time.perf_counter() - start
+
+        circle = reader.last_circle
+        center_error = None
+        if circle is not None:
+            center_error = float(np.hypot(circle[0] - label['center'][0], circle[1] - label['center'][1]))
+
+        rows.append({
+            'seed': int(seed),
+            'needle_color': label['needle_color'],
+            'angle': label['angle'],
+            'raw_angle': raw_angle,
+            'center_error': center_error,
+            'seconds': elapsed
+        })
+    return rows
+
+# Signed difference between two angles in degrees, wrapped to [-180, 180)
+def angle_error(measured, expected):
+    return (measured - expected + 180) % 360 - 180
+
+def distribution(values):
+
+    values = np.abs(np.asarray(values, dtype=np.float64))
+    if len(values) == 0:
+        return None
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        'p50': round(float(p50), 3), 'p90': round(float(p90), 3), 'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3), 'max': round(float(values.max()), 3), 'mean': round(float(values.mean()), 3)
+    }
+
+# Detection rates and error distributions for a set of result rows
+def summarize(rows):
+
+    found = [row for row in rows if row['center_error'] is not None]
+    read = [row for row in rows if row['raw_angle'] is not None]
+
+    angle_errors = [angle_error(row['raw_angle'], row['angle']) for row in read]
+    psi_errors = [
+        calculate_psi(row['raw_angle'], MIN_ANGLE, MAX_ANGLE, MIN_PSI, MAX_PSI) -
+        calculate_psi(row['angle'], MIN_ANGLE, MAX_ANGLE, MIN_PSI, MAX_PSI)
+        for row in read
+    ]
+    abs_errors = np.abs(angle_errors)
+
+    return {
+        'frames': len(rows),
+        'circle_rate': round(len(found) / len(rows), 4) if rows else 0.0,
+        'reading_rate': round(len(read) / len(rows), 4) if rows else 0.0,
+        'within_1deg': round(float(np.mean(abs_errors <= 1)), 4) if read else 0.0,
+        'within_5deg': round(float(np.mean(abs_errors <= 5)), 4) if read else 0.0,
+        'angle_error_deg': distribution(angle_errors),
+        'psi_error': distribution(psi_errors),
+        'center_error_px': distribution([row['center_error'] for row in found]),
+        'fps_per_worker': round(len(rows) / sum(row['seconds'] for row in rows), 1) if rows else 0.0
+    }
+
+def print_summary(name, summary):
+
+    angle = summary['angle_error_deg'] or {}
+    psi = summary['psi_error'] or {}
+    print(f"{name:<8} {summary['frames']:>6} {summary['circle_rate']:>7.1%} {summary['reading_rate']:>8.1%} "
+          f"{summary['within_1deg']:>7.1%} {summary['within_5deg']:>7.1%} "
+          f"{angle.get('p50', float('nan')):>8.2f} {angle.get('p95', float('nan')):>8.2f} "
+          f"{psi.get('p50', float('nan')):>7.2f} {psi.get('p95', float('nan')):>7.2f} {summary['fps_per_worker']:>8.1f}")
+
+# Accuracy regressions against a baseline report: fewer readings, or a larger p95
+# angle error by more than tolerance degrees. Speed is reported but never flagged,
+# it depends too much on the machine.
+def find_regressions(report, baseline, rate_tolerance=0.01, angle_tolerance=0.5):
+
+    regressions = []
+    for name, summary in report['summaries'].items():
+        old = baseline['summaries'].get(name)
+        if old is None:
+            continue
+        if summary['reading_rate'] < old['reading_rate'] - rate_tolerance:
+            regressions.append(f"{name} reading rate {old['reading_rate']:.1%} -> {summary['reading_rate']:.1%}")
+        if summary['angle_error_deg'] and old['angle_error_deg']:
+            before, after = old['angle_error_deg']['p95'], summary['angle_error_deg']['p95']
+            if after > before + angle_tolerance:
+                regressions.append(f"{name} p95 angle error {before:.2f} -> {after:.2f} deg")
+    return regressions
+
+def run_harness(count=2000, workers=None, height=720, width=1280, seed=0, chunk_size=25,
+                output='bench_accuracy.json', baseline=None, reader_options=None):
+
+    workers = workers or os.cpu_count() or 1
+    reader_options = reader_options or {}
+    seeds = np.arange(seed, seed + count)
+    tasks = [(seeds[i:i + chunk_size], height, width, reader_options) for i in range(0, count, chunk_size)]
+
+    print(f"Reading {count} synthetic {height}p gauges on {workers} worker(s)...")
+    start = time.perf_counter()
+    with mp.Pool(workers, initializer=_init_worker) as pool:
+        rows = [row for chunk in pool.imap_unordered(evaluate_chunk, tasks) for row in chunk]
+    wall_time = time.perf_counter() - start
+    rows.sort(key=lambda row: row['seed'])
+
+    summaries = {'all': summarize(rows)}
+    for color in sorted({row['needle_color'] for row in rows}):
+        summaries[color] = summarize([row for row in rows if row['needle_color'] == color])
+
+    print(f"{'needle':<8} {'frames':>6} {'circle':>7} {'reading':>8} {'<=1deg':>7} {'<=5deg':>7} "
+          f"{'p50 deg':>8} {'p95 deg':>8} {'p50 psi':>7} {'p95 psi':>7} {'fps/wkr':>8}")
+    for name, summary in summaries.items():
+        print_summary(name, summary)
+    print(f"Total throughput: {count / wall_time:.1f} frames/s (including rendering)")
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+            'workers': workers,
+            'resolution': [height, width],
+            'seed': seed,
+            'reader_options': reader_options,
+            'throughput_fps': round(count / wall_time, 1)
+        },
+        'summaries': summaries,
+        # Worst readings, to look at with synthetic.random_gauge(np.random.default_rng(seed))
+        'worst': sorted(
+            ({'seed': row['seed'], 'needle_color': row['needle_color'], 'angle': round(row['angle'], 2),
+              'error': round(float(angle_error(row['raw_angle'], row['angle'])), 2)}
+             for row in rows if row['raw_angle'] is not None),
+            key=lambda item: -abs(item['error'])
+        )[:20]
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+
+    if baseline is None:
+        return True
+
+    with open(baseline, 'r') as f:
+        regressions = find_regressions(report, json.load(f))
+    if not regressions:
+        print(f"No accuracy regressions against {baseline}")
+        return True
+
+    print(f"Accuracy regressions against {baseline}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy and throughput of GaugeReader on labelled synthetic gauges.")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="Number of synthetic frames (default: 2000)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--height", type=int, default=720, help="Frame height (default: 720)")
+    parser.add_argument("--width", type=int, default=1280, help="Frame width (default: 1280)")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="First random seed, frames are reproducible (default: 0)")
+    parser.add_argument("-o", "--output", default="bench_accuracy.json", help="JSON results file (default: bench_accuracy.json)")
+    parser.add_argument("-b", "--baseline", help="Earlier results file to compare against")
+    parser.add_argument("-e", "--engine", default="hough", choices=["hough", "polar"], help="Needle detector (default: hough)")
+    args = parser.parse_args()
+
+    ok = run_harness(args.count, args.workers, args.height, args.width, args.seed,
+                     output=args.output, baseline=args.baseline, reader_options={'needle_engine': args.engine})
+    sys.exit(0 if ok else 1)
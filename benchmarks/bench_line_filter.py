@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import numpy as np
+
+# Make the application modules importable (they live in src/ and use flat imports)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from helpers import select_needle_line
+
+# Reference implementation: the per-line Python loop GaugeReader used before vectorization
+def select_needle_line_loop(lines, cx, cy, r):
+
+    best_line = None
+    max_reach = 0
+
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+
+        num = abs((y2 - y1) * cx - (x2 - x1) * cy + x2 * y1 - y2 * x1)
+        den = np.sqrt((y2 - y1)**2 + (x2 - x1)**2)
+        if den == 0 or (num / den) > 15:
+            continue
+
+        dist1 = np.sqrt((x1 - cx)**2 + (y1 - cy)**2)
+        dist2 = np.sqrt((x2 - cx)**2 + (y2 - cy)**2)
+
+        current_tip_dist = max(dist1, dist2)
+        closest_dist = min(dist1, dist2)
+        if closest_dist > (r * 0.30):
+            continue
+
+        if current_tip_dist > max_reach:
+            max_reach = current_tip_dist
+            best_line = (int(x1), int(y1), int(x2), int(y2))
+
+    return best_line
+
+# Random HoughLinesP-shaped (N, 1, 4) output: a few needle-like lines through the hub
+# among many short clutter segments (printed text, tick marks)
+def make_lines(count, cx, cy, r, rng):
+
+    lines = np.empty((count, 1, 4), dtype=np.int32)
+
+    n_needle = max(1, count // 20)
+    angles = rng.uniform(0, 2 * np.pi, n_needle)
+    hub = rng.uniform(0, r * 0.25, n_needle)
+    tip = rng.uniform(r * 0.5, r * 0.95, n_needle)
+    lines[:n_needle, 0, 0] = cx - hub * np.cos(angles)
+    lines[:n_needle, 0, 1] = cy + hub * np.sin(angles)
+    lines[:n_needle, 0, 2] = cx + tip * np.cos(angles)
+    lines[:n_needle, 0, 3] = cy - tip * np.sin(angles)
+
+    start = rng.uniform(-r, r, (count - n_needle, 2))
+    step = rng.uniform(-r * 0.2, r * 0.2, (count - n_needle, 2))
+    lines[n_needle:, 0, :2] = np.array([cx, cy]) + start
+    lines[n_needle:, 0, 2:] = np.array([cx, cy]) + start + step
+
+    rng.shuffle(lines)
+    return lines
+
+def time_call(func, lines, cx, cy, r, repeats):
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(lines, cx, cy, r)
+    return (time.perf_counter() - start) / repeats
+
+def run_benchmark(line_counts=(1, 10, 50, 100, 250, 500, 1000, 2000), repeats=50, seed=0):
+
+    rng = np.random.default_rng(seed)
+    cx, cy, r = 640, 360, 300
+
+    print(f"{'lines':>6} {'loop (us)':>12} {'vector (us)':>12} {'speedup':>8}")
+    for count in line_counts:
+        lines = make_lines(count, cx, cy, r, rng)
+
+        # Both implementations must agree before timing means anything
+        expected = select_needle_line_loop(lines, cx, cy, r)
+        actual = select_needle_line(lines, cx, cy, r)
+        assert expected == actual, f"Selection mismatch for {count} lines: {expected} != {actual}"
+
+        loop_time = time_call(select_needle_line_loop, lines, cx, cy, r, repeats)
+        vector_time = time_call(select_needle_line, lines, cx, cy, r, repeats)
+        print(f"{count:>6} {loop_time * 1e6:>12.1f} {vector_time * 1e6:>12.1f} {loop_time / vector_time:>7.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
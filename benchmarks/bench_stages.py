@@ -0,0 +1,182 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+
+# Make the application modules importable (they live in src/ and use flat imports)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+from gauge import GaugeReader
+from helpers import select_needle_line
+from synthetic import MAX_ANGLE, MIN_ANGLE, render_gauge
+
+RESOLUTIONS = {'480p': (480, 854), '720p': (720, 1280), '1080p': (1080, 1920)}
+CLUTTER_LEVELS = (0, 25, 100) # Stray line segments in the needle color drawn on the dial
+STAGES = ('blur', 'hough_circles', 'masking', 'threshold', 'hough_lines', 'selection', 'read_frame')
+
+# Named input frames: synthetic gauges at every resolution and clutter level,
+# plus the photos in src/assets scaled to each resolution
+def make_inputs(resolutions, seed=0):
+
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for name in resolutions:
+        height, width = RESOLUTIONS[name]
+        for clutter in CLUTTER_LEVELS:
+            angle = rng.uniform(MAX_ANGLE, MIN_ANGLE)
+            frame, _ = render_gauge(angle, height, width, clutter=clutter, rng=rng)
+            inputs.append((f"synthetic_{name}_clutter{clutter}", 'red', frame))
+
+        for path in sorted(glob.glob(os.path.join(SRC_DIR, 'assets', '*'))):
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            scale = height / image.shape[0]
+            image = cv2.resize(image, (int(image.shape[1] * scale), height), interpolation=cv2.INTER_AREA)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            inputs.append((f"{stem}_{name}", 'black', image))
+
+    return inputs
+
+def time_stage(func, repeats):
+
+    samples = np.empty(repeats)
+    result = None
+    for i in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        samples[i] = time.perf_counter() - start
+    return samples * 1000, result
+
+def summarize(samples_ms):
+
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'fps': round(float(1000 / samples_ms.mean()), 1)
+    }
+
+# Time every stage of GaugeReader on one frame. Stages after circle detection
+# use the detected circle; they are skipped if no gauge was found.
+def bench_frame(frame, needle_color, repeats):
+
+    reader = GaugeReader(0, 0, 0, 100, needle_color=needle_color)
+    results = {}
+
+    def blur():
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (9, 9), 2)
+
+    samples, _ = time_stage(blur, repeats)
+    results['blur'] = summarize(samples)
+
+    # Full circle search as GaugeReader runs it (grayscale, pyramid, HoughCircles)
+    samples, circles = time_stage(lambda: reader._detect_circles(frame), repeats)
+    results['hough_circles'] = summarize(samples)
+
+    if circles:
+        cx, cy, r = circles[0]
+        samples, (roi, mask, x0, y0) = time_stage(lambda: reader._needle_roi(frame, cx, cy, r), repeats)
+        results['masking'] = summarize(samples)
+
+        samples, needle_mask = time_stage(lambda: reader._needle_mask(roi, mask), repeats)
+        results['threshold'] = summarize(samples)
+
+        samples, lines = time_stage(lambda: reader._needle_lines(needle_mask, r), repeats)
+        results['hough_lines'] = summarize(samples)
+
+        if lines is not None:
+            samples, _ = time_stage(lambda: select_needle_line(lines, cx - x0, cy - y0, r), repeats)
+            results['selection'] = summarize(samples)
+            results['selection']['lines'] = len(lines)
+
+    # End to end, without tracking so every frame pays for the full detection
+    samples, reading = time_stage(lambda: reader.read_frame(frame, annotate=False), repeats)
+    results['read_frame'] = summarize(samples)
+    results['read_frame']['circle_found'] = bool(circles)
+    results['read_frame']['needle_found'] = reading[2] is not None
+
+    return results
+
+def print_table(results):
+
+    print(f"{'input':<34} {'stage':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fps':>9}")
+    for name, stages in results.items():
+        for stage in STAGES:
+            if stage in stages:
+                s = stages[stage]
+                print(f"{name:<34} {stage:<14} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['fps']:>9.1f}")
+
+# Stages whose p50 got slower than the baseline by more than tolerance (a fraction).
+# Differences below min_delta_ms are timer noise and never count.
+def find_regressions(results, baseline, tolerance=0.2, min_delta_ms=0.05):
+
+    regressions = []
+    for name, stages in results.items():
+        for stage, stats in stages.items():
+            old = baseline.get(name, {}).get(stage)
+            if old is None:
+                continue
+            delta = stats['p50_ms'] - old['p50_ms']
+            if delta > min_delta_ms and stats['p50_ms'] > old['p50_ms'] * (1 + tolerance):
+                regressions.append((name, stage, old['p50_ms'], stats['p50_ms']))
+    return regressions
+
+def run_benchmark(resolutions=('480p', '720p', '1080p'), repeats=30, output='bench_stages.json',
+                  baseline=None, tolerance=0.2, seed=0):
+
+    results = {}
+    for name, needle_color, frame in make_inputs(resolutions, seed):
+        results[name] = bench_frame(frame, needle_color, repeats)
+
+    print_table(results)
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'repeats': repeats
+        },
+        'results': results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+
+    if baseline is None:
+        return True
+
+    with open(baseline, 'r') as f:
+        regressions = find_regressions(results, json.load(f)['results'], tolerance)
+
+    if not regressions:
+        print(f"No regressions against {baseline} (tolerance {tolerance:.0%})")
+        return True
+
+    print(f"Regressions against {baseline} (p50 slower by more than {tolerance:.0%}):")
+    for name, stage, old, new in regressions:
+        print(f"  {name} {stage}: {old:.3f} ms -> {new:.3f} ms")
+    return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency of the gauge reading pipeline.")
+    parser.add_argument("-r", "--resolutions", nargs='+', default=['480p', '720p', '1080p'], choices=list(RESOLUTIONS))
+    parser.add_argument("-n", "--repeats", type=int, default=30, help="Timed runs per stage and input (default: 30)")
+    parser.add_argument("-o", "--output", default="bench_stages.json", help="JSON results file (default: bench_stages.json)")
+    parser.add_argument("-b", "--baseline", help="Earlier results file to compare against")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2, help="Allowed p50 slowdown as a fraction (default: 0.2)")
+    args = parser.parse_args()
+
+    ok = run_benchmark(args.resolutions, args.repeats, args.output, args.baseline, args.tolerance)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,183 @@
+import os
+import struct
+import time
+import numpy as np
+from rotation import LogRotator, open_segment, segment_paths
+from metrics import metrics
+
+# File header: magic, format version, record size, padding to 16 bytes
+_MAGIC = b'GTLM'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHH8x')
+
+# One fixed-width little-endian record per processed frame (32 bytes)
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'), # Capture time in seconds (epoch, or video time for replays)
+    ('seq', '<i8'), # Camera frame sequence number, 0 if unknown
+    ('psi', '<f4'), # Smoothed reading, NaN if there was none
+    ('raw_angle', '<f4'), # Needle angle in degrees, NaN if there was none
+    ('cx', '<i2'), # Gauge circle, -1 if no gauge was found
+    ('cy', '<i2'),
+    ('radius', '<i2'),
+    ('flags', '<u2')
+])
+_RECORD = struct.Struct('<dqffhhhH')
+
+# Detection flags
+FLAG_CIRCLE = 1 # A gauge circle was found
+FLAG_NEEDLE = 2 # A needle line was found (the record has a reading)
+FLAG_TRACKED = 4 # The circle was reused from tracking instead of a full search
+
+class BinaryLogger:
+    def __init__(self, log_file='telemetry_log.bin', flush_interval=1.0, fsync_interval=10.0,
+                 rotate_bytes=0, rotate_interval=0, compress=True):
+        """
+        Append-only binary telemetry log with one fixed-width record per
+        processed frame, including frames without a reading. Records are
+        packed straight into the open file's buffer, which is flushed every
+        flush_interval seconds and fsync'ed every fsync_interval seconds and
+        on close(). Read it back with BinaryLogReader, or with read_records()
+        for a rotated log (rotate_bytes / rotate_interval, see LogRotator).
+        """
+        self.log_file = log_file
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.last_flush = self.last_fsync = time.time()
+
+        self.rotator = None
+        if rotate_bytes or rotate_interval:
+            self.rotator = LogRotator(log_file, rotate_bytes, rotate_interval, compress)
+
+        self.file = None
+        self._start_file()
+        if self.file is not None:
+            print(f"Data logging started: {self.log_file}")
+
+    # Append one record, timestamp defaults to the current time
+    def log(self, psi_value, timestamp=None, seq=0, raw_angle=None, circle=None, tracked=False):
+
+        if self.file is None:
+            return
+
+        start = time.perf_counter()
+        flags = 0
+        cx = cy = radius = -1
+        if circle is not None:
+            cx, cy, radius = circle
+            flags |= FLAG_CIRCLE
+            if tracked:
+                flags |= FLAG_TRACKED
+        if psi_value is not None:
+            flags |= FLAG_NEEDLE
+
+        now = time.time()
+        try:
+            self.file.write(_RECORD.pack(
+                now if timestamp is None else timestamp,
+                seq,
+                np.nan if psi_value is None else psi_value,
+                np.nan if raw_angle is None else raw_angle,
+                cx, cy, radius, flags
+            ))
+
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+            if now - self.last_fsync >= self.fsync_interval:
+                os.fsync(self.file.fileno())
+                self.last_fsync = now
+
+            if self.rotator is not None and self.rotator.should_rotate(self.file.tell()):
+                self._close_file()
+                self.rotator.finish_segment()
+                self._start_file()
+        except Exception as e:
+            print(f"Error logging data: {e}")
+
+        metrics.observe('log', time.perf_counter() - start)
+
+    # Flush and sync the file to disk
+    def close(self):
+
+        if self.file is not None:
+            self._close_file()
+
+        if self.rotator is not None:
+            # Compress the last segment as well and wait for it
+            self.rotator.finish_segment()
+            self.rotator.close()
+            self.rotator = None
+
+    # Open the log (or its next segment) and write the file header
+    def _start_file(self):
+
+        path = self.rotator.start_segment() if self.rotator is not None else self.log_file
+        try:
+            self.file = open(path, 'wb')
+            self.file.write(_HEADER.pack(_MAGIC, _VERSION, RECORD_DTYPE.itemsize))
+        except Exception as e:
+            print(f"Error initializing log file: {e}")
+
+    def _close_file(self):
+
+        try:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except Exception as e:
+            print(f"Error logging data: {e}")
+        self.file.close()
+        self.file = None
+
+class BinaryLogReader:
+    def __init__(self, log_file):
+        """
+        Memory-mapped view of a BinaryLogger file. records is a structured
+        NumPy array backed by the file, so columns such as records['psi']
+        are read without any parsing or copying. A partially written last
+        record (e.g. after a power cut) is ignored.
+        """
+        self.log_file = log_file
+
+        with open(log_file, 'rb') as f:
+            magic, version, record_size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Not a telemetry log (or unsupported version): {log_file}")
+        self.version = version
+
+        count = (os.path.getsize(log_file) - _HEADER.size) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(log_file, dtype=RECORD_DTYPE, mode='r', offset=_HEADER.size, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    # Records with start <= timestamp < end as a view into the file.
+    # Timestamps are written in capture order, so a binary search is enough.
+    def time_range(self, start=None, end=None):
+
+        timestamps = self.records['timestamp']
+        first = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        last = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='left')
+        return self.records[first:last]
+
+    # Only the records that carry a reading
+    def readings(self, start=None, end=None):
+
+        records = self.time_range(start, end)
+        return records[(records['flags'] & FLAG_NEEDLE) != 0]
+
+# Stream a rotated binary log one segment at a time as structured arrays.
+# Uncompressed segments are memory-mapped, gzipped ones are decompressed.
+def read_records(log_file='telemetry_log.bin'):
+    paths = segment_paths(log_file) or [log_file]
+    for path in paths:
+        if not path.endswith('.gz'):
+            yield BinaryLogReader(path).records
+            continue
+
+        with open_segment(path) as f:
+            data = f.read()
+        count = (len(data) - _HEADER.size) // RECORD_DTYPE.itemsize
+        yield np.frombuffer(data, dtype=RECORD_DTYPE, count=max(count, 0), offset=_HEADER.size)
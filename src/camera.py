@@ -1,6 +1,10 @@
 import cv2
+import numpy as np
+import queue
 import threading
 import time
+from frame_ring import SharedFrameRing
+from metrics import metrics
 
 # Dedicated Camera Class with Multi-threading capabilities for increased FPS
 class ThreadedCamera:
@@ -10,14 +14,21 @@ class ThreadedCamera:
 
         # Minimize buffer size to reduce latency
         self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        
+
         # Set resolution
         self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
         self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        
+
         # Read the first frame to ensure we have data
         (self.status, self.frame) = self.capture.read()
-        
+
+        # Every captured frame gets a monotonic sequence number and a capture timestamp
+        self.frame_seq = 1 if self.status else 0
+        self.frame_time = time.time()
+
+        # Guards frame swaps and wakes up readers waiting for a new frame
+        self.condition = threading.Condition()
+
         # Used as a flag to stop the thread when needed
         self.stopped = False
 
@@ -35,17 +46,194 @@ class ThreadedCamera:
         while True:
             if self.stopped:
                 self.capture.release()
+                with self.condition:
+                    self.condition.notify_all()
                 return
 
             # Read the next frame from the stream
-            (self.status, self.frame) = self.capture.read()
+            with metrics.timer('camera_read'):
+                (status, frame) = self.capture.read()
+            capture_time = time.time()
+            if status:
+                metrics.tick('frames_captured')
+
+            with self.condition:
+                self.status = status
+                if status:
+                    self.frame = frame
+                    self.frame_seq += 1
+                    self.frame_time = capture_time
+                    self.condition.notify_all()
+
+            if not status:
+                # Camera not ready or disconnected, don't spin the CPU
+                time.sleep(0.01)
 
     # Return most recent frame from the buffer
     def read(self):
 
-        return self.status, self.frame
+        with self.condition:
+            return self.status, self.frame
+
+    # Block until a frame newer than last_seq arrives (or timeout seconds pass).
+    # Returns (status, frame, frame sequence number, capture timestamp);
+    # status is False and frame None if no new frame arrived in time.
+    def read_new(self, last_seq=0, timeout=None):
+
+        with self.condition:
+            has_new = self.condition.wait_for(
+                lambda: self.frame_seq > last_seq or self.stopped, timeout
+            )
+            if not has_new or self.frame_seq <= last_seq:
+                return False, None, last_seq, None
+            return True, self.frame, self.frame_seq, self.frame_time
 
     # Stop the thread
     def stop(self):
 
         self.stopped = True
+
+# Camera that publishes frames into a shared memory ring so that consumers in
+# other processes (reader, recorder, preview) can read them without copies
+class SharedMemoryCamera(ThreadedCamera):
+    def __init__(self, src=0, slots=8, name=None, first_frame_timeout=5.0):
+        super().__init__(src)
+
+        # The ring can't be resized once consumers attach, so it is sized from a
+        # real frame. Cameras often fail the first reads while warming up.
+        deadline = time.monotonic() + first_frame_timeout
+        while not self.status and time.monotonic() < deadline:
+            time.sleep(0.01)
+            (self.status, self.frame) = self.capture.read()
+            self.frame_seq = 1 if self.status else 0
+            self.frame_time = time.time()
+
+        if self.status:
+            shape = self.frame.shape
+        else:
+            # Fall back to the size the backend reports
+            width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if width <= 0 or height <= 0:
+                self.capture.release()
+                raise IOError(f"Camera {src} delivered no frame within {first_frame_timeout}s and reports no frame size")
+            shape = (height, width, 3)
+            print(f"Camera {src}: no frame yet, sizing the shared memory ring to the reported {width}x{height}")
+
+        self.size_mismatch = False # A frame didn't fit the ring, reported once
+        self.ring = SharedFrameRing(name=name, shape=shape, slots=slots, create=True)
+        self.name = self.ring.name
+
+        if self.status:
+            self.ring.write(self.frame, self.frame_time)
+            self.frame = self.ring.frames[0]
+
+    # Capture straight into the next ring slot
+    def update(self):
+        while True:
+            if self.stopped:
+                self.capture.release()
+                with self.condition:
+                    self.condition.notify_all()
+                self.ring.close()
+                return
+
+            slot, seq = self.ring.write_slot()
+            buffer = self.ring.frames[slot]
+            with metrics.timer('camera_read'):
+                (status, frame) = self.capture.read(buffer)
+            capture_time = time.time()
+
+            if status and frame is not buffer:
+                # Backend could not decode in place (e.g. size changed)
+                if frame.shape != buffer.shape:
+                    if not self.size_mismatch:
+                        print(f"Camera: frame size {frame.shape} doesn't match the shared memory ring "
+                              f"{buffer.shape}, dropping frames until it does")
+                        self.size_mismatch = True
+                    metrics.increment('frames_dropped')
+                    status = False
+                else:
+                    self.size_mismatch = False
+                    np.copyto(buffer, frame)
+
+            if status:
+                metrics.tick('frames_captured')
+
+            with self.condition:
+                self.status = status
+                if status:
+                    self.ring.publish(slot, seq, capture_time)
+                    self.frame = buffer
+                    self.frame_seq = seq
+                    self.frame_time = capture_time
+                    self.condition.notify_all()
+
+            if not status:
+                # Camera not ready or disconnected, don't spin the CPU
+                time.sleep(0.01)
+
+# Recorded video source: decodes a file on a background thread as fast as the
+# consumer takes frames (no dropping, the bounded queue applies backpressure)
+class VideoFileSource:
+    def __init__(self, path, every=1, queue_size=8):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not open video file: {path}")
+
+        self.every = max(1, int(every)) # Only decode every Nth frame
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stopped = False
+
+    # Start the decoding thread
+    def start(self):
+
+        t = threading.Thread(target=self.update, args=())
+        t.daemon = True
+        t.start()
+        return self
+
+    # Decode frames into the queue until the file ends or the source is stopped
+    def update(self):
+        index = 0
+        while not self.stopped:
+            # Skipped frames are only grabbed, not decoded
+            if index % self.every == 0:
+                status, frame = self.capture.read()
+            else:
+                status, frame = self.capture.grab(), None
+
+            if not status:
+                break
+
+            if frame is not None:
+                video_time = index / self.fps
+                self._put((index, video_time, frame))
+            index += 1
+
+        self.capture.release()
+        self._put(None) # End of stream
+
+    def _put(self, item):
+        while not self.stopped:
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    # Yield (frame index, video time in seconds, frame) until the file ends
+    def __iter__(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            yield item
+
+    # Stop decoding
+    def stop(self):
+
+        self.stopped = True
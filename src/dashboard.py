@@ -2,13 +2,19 @@ import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 from matplotlib.widgets import Button, RadioButtons, TextBox
 from collections import deque
+import threading
+import time
 import numpy as np
 import cv2
 from helpers import calculate_angle
+from metrics import metrics
+
+# Stages listed in the metrics overlay
+METRIC_STAGES = ('camera_read', 'circle_detection', 'needle_detection', 'read_frame', 'log', 'render')
 
 class Dashboard:
     def __init__(self, config_callback=None, calibration_callback=None, min_angle_callback=None, 
-                 min_angle=0, max_angle=0, max_points=100):
+                 min_angle=0, max_angle=0, max_points=100, render_fps=15, show_metrics=False):
         self.max_points = max_points
         self.data = deque([0] * max_points, maxlen=max_points)
         self.config_callback = config_callback
@@ -26,6 +32,9 @@ class Dashboard:
         self.calib_min_angle = 0
         self.calib_max_angle = 0
         self.current_raw_angle = 0 # Store latest angle for capture
+
+        # Draw frame rates and stage latencies over the webcam feed
+        self.show_metrics = show_metrics
         
         # Enable Interactive Mode
         plt.ion()
@@ -75,9 +84,28 @@ class Dashboard:
         plt.tight_layout()
         plt.show(block=False)
 
+        # Rendering state: processing threads submit results, the GUI thread renders
+        # the latest one at render_fps using blitting
+        self.render_fps = render_fps
+        self.render_timer = None
+        self.lock = threading.Lock()
+        self.latest_frame = None
+        self.latest_psi = None
+        self.has_new_data = False
+        self.background = None
+
+        # Cached static overlay for the webcam feed
+        self.overlay_key = None
+        self.overlay_cache = None
+
+        # Only these artists change every frame; everything else is cached in the background
+        self.line.set_animated(True)
+        self.text_psi.set_animated(True)
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
     # Changes color needle algorithm is trying to detect
     def on_color_change(self, label):
-        color_map = {'Red': 'red', 'Black': 'black', 'Blue': 'blue'}
+        color_map = {'Red': 'red', 'Black': 'black', 'Blue': 'blue', 'Yellow': 'yellow', 'White': 'white'}
         selected_color = color_map.get(label, 'red')
         print(f"Needle color changed to: {selected_color}")
         if self.config_callback:
@@ -133,8 +161,8 @@ class Dashboard:
         self.calib_widgets.append(ax_title)
 
         # Radio Buttons for Needle Color
-        ax_radio = self.fig.add_axes([0.65, 0.4, 0.2, 0.2]) 
-        self.radio = RadioButtons(ax_radio, ('Red', 'Black', 'Blue'))
+        ax_radio = self.fig.add_axes([0.65, 0.35, 0.2, 0.3]) 
+        self.radio = RadioButtons(ax_radio, ('Red', 'Black', 'Blue', 'Yellow', 'White'))
         self.radio.on_clicked(self.on_color_change)
         self.calib_widgets.append(ax_radio)
         self.calib_components.append(self.radio)
@@ -244,47 +272,128 @@ class Dashboard:
             
         self.restore_right_panel()
 
-    # Update dashboard with new frame and PSI value
+    # Update dashboard with new frame and PSI value (submit and render right away)
     def update(self, processed_frame, psi_value, raw_angle=None):
         
-        self.current_raw_angle = raw_angle if raw_angle is not None else 0
-        
-        # Update Webcam
-        if processed_frame is not None:
-            h, w = processed_frame.shape[:2]
-            cx, cy = int(w/2), int(h/2)
-            # Expanded radius to match typical gauge detection size (approx 45% of height)
-            r = int(h * 0.45)
-            
-            # Static Overlays over webcam feed for gauge alignment
-            # 1. Green Guide Circle
-            cv2.circle(processed_frame, (cx, cy), r, (0, 255, 0), 2)
-            cv2.putText(processed_frame, "ALIGN GAUGE", (cx-60, cy-r-10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # 2. Blue Ticker Lines (Based on current calibration)
-            # Draw short ticks for min and max angles
-            tick_len = int(r * 0.15)
+        self.submit(processed_frame, psi_value, raw_angle)
+        self.render()
+
+    # Store the latest result; cheap and safe to call from a processing thread
+    def submit(self, processed_frame, psi_value, raw_angle=None):
+
+        with self.lock:
+            self.current_raw_angle = raw_angle if raw_angle is not None else 0
+            if processed_frame is not None:
+                self.latest_frame = processed_frame
             
-            # Min Angle Ticker
-            rad_min = np.radians(self.min_angle)
-            x_min_out = int(cx + r * np.cos(rad_min))
-            y_min_out = int(cy - r * np.sin(rad_min))
-            x_min_in = int(cx + (r - tick_len) * np.cos(rad_min))
-            y_min_in = int(cy - (r - tick_len) * np.sin(rad_min))
+            # Only update Graph/PSI if NOT in calibration mode
+            if self.calibration_mode == 0:
+                self.latest_psi = psi_value
+                if psi_value is not None:
+                    self.data.append(psi_value)
+                else:
+                    self.data.append(self.data[-1] if self.data else 0)
             
-            cv2.line(processed_frame, (x_min_in, y_min_in), (x_min_out, y_min_out), (255, 0, 0), 3)
-            cv2.putText(processed_frame, "MIN", (x_min_out, y_min_out), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-            # Max Angle Ticker
-            rad_max = np.radians(self.max_angle)
-            x_max_out = int(cx + r * np.cos(rad_max))
-            y_max_out = int(cy - r * np.sin(rad_max))
-            x_max_in = int(cx + (r - tick_len) * np.cos(rad_max))
-            y_max_in = int(cy - (r - tick_len) * np.sin(rad_max))
+            self.has_new_data = True
+
+    # Refresh the dashboard at render_fps from the GUI event loop
+    def start_render_timer(self):
+
+        self.render_timer = self.fig.canvas.new_timer(interval=int(1000 / self.render_fps))
+        self.render_timer.add_callback(self.render)
+        self.render_timer.start()
+
+    # Cache the static background after every full redraw (resize, widgets, axis changes)
+    def on_draw(self, event):
+
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+
+        if self.im_webcam is not None:
+            self.fig.draw_artist(self.im_webcam)
+        if self.calibration_mode == 0:
+            self.fig.draw_artist(self.line)
+            self.fig.draw_artist(self.text_psi)
+
+    # Forget the cached static overlay (e.g. after a calibration change)
+    def invalidate_overlay(self):
+
+        self.overlay_key = None
+        self.overlay_cache = None
+
+    # Guide circle and MIN/MAX ticks as (pixel indices, BGR colors), cached on
+    # (frame shape, min_angle, max_angle, calibration step)
+    def get_static_overlay(self, shape):
+
+        key = (shape, self.min_angle, self.max_angle, self.calibration_mode)
+        if self.overlay_key == key:
+            return self.overlay_cache
+
+        h, w = shape[:2]
+        cx, cy = int(w/2), int(h/2)
+        # Expanded radius to match typical gauge detection size (approx 45% of height)
+        r = int(h * 0.45)
+
+        # Draw into a transparent BGRA layer, the alpha channel becomes the mask
+        layer = np.zeros((h, w, 4), dtype=np.uint8)
+        
+        # 1. Green Guide Circle
+        cv2.circle(layer, (cx, cy), r, (0, 255, 0, 255), 2)
+        cv2.putText(layer, "ALIGN GAUGE", (cx-60, cy-r-10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0, 255), 2)
+        
+        # 2. Blue Ticker Lines (Based on current calibration)
+        # Draw short ticks for min and max angles
+        tick_len = int(r * 0.15)
+        
+        for angle, label in ((self.min_angle, "MIN"), (self.max_angle, "MAX")):
+            rad = np.radians(angle)
+            x_out = int(cx + r * np.cos(rad))
+            y_out = int(cy - r * np.sin(rad))
+            x_in = int(cx + (r - tick_len) * np.cos(rad))
+            y_in = int(cy - (r - tick_len) * np.sin(rad))
             
-            cv2.line(processed_frame, (x_max_in, y_max_in), (x_max_out, y_max_out), (255, 0, 0), 3)
-            cv2.putText(processed_frame, "MAX", (x_max_out, y_max_out), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            cv2.line(layer, (x_in, y_in), (x_out, y_out), (255, 0, 0, 255), 3)
+            cv2.putText(layer, label, (x_out, y_out), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0, 255), 2)
+
+        # The overlay only covers a few thousand pixels, so keep just their flat
+        # indices and colors; a scatter is much cheaper than a full-frame masked copy
+        layer = layer.reshape(-1, 4)
+        overlay_index = np.flatnonzero(layer[:, 3])
+        overlay_colors = layer[overlay_index, :3].copy()
+
+        self.overlay_key = key
+        self.overlay_cache = (overlay_index, overlay_colors)
+        return self.overlay_cache
+
+    # Draw the latest submitted result, redrawing only the changing artists
+    def render(self):
+
+        with self.lock:
+            if not self.has_new_data and not self.fig.stale:
+                return
+            self.has_new_data = False
+            processed_frame = self.latest_frame
+            self.latest_frame = None
+            psi_value = self.latest_psi
+            data = list(self.data)
+        
+        start = time.perf_counter()
+        metrics.tick('frames_rendered')
+        canvas = self.fig.canvas
+        
+        # Animated artists don't mark the figure stale, so this only catches widget
+        # and layout changes (e.g. calibration steps)
+        needs_full_draw = self.background is None or self.fig.stale or not canvas.supports_blit
+        
+        # Update Webcam
+        if processed_frame is not None:
+            # Static Overlays over webcam feed for gauge alignment, rendered once and
+            # composited with a single vectorized write
+            overlay_index, overlay_colors = self.get_static_overlay(processed_frame.shape)
+            processed_frame.reshape(-1, 3)[overlay_index] = overlay_colors
 
             # Draw Calibration Overlay if needed
             if self.calibration_mode > 0:
@@ -292,10 +401,14 @@ class Dashboard:
                     cv2.putText(processed_frame, f"Angle: {self.current_raw_angle:.1f}", (50, 50), 
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
 
+            if self.show_metrics:
+                self.draw_metrics(processed_frame)
+
             # Convert BGR (OpenCV) to RGB (Matplotlib)
             frame_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
             if self.im_webcam is None:
-                self.im_webcam = self.ax_webcam.imshow(frame_rgb)
+                self.im_webcam = self.ax_webcam.imshow(frame_rgb, animated=True)
+                needs_full_draw = True # New artist changes the axes limits
             else:
                 self.im_webcam.set_data(frame_rgb)
 
@@ -312,21 +425,54 @@ class Dashboard:
                     self.text_psi.set_color('orange')
                 else: 
                     self.text_psi.set_color('green')
-                
-                self.data.append(psi_value)
-                
-                # Auto-scale Y-axis
-                if psi_value > self.ax_graph.get_ylim()[1]:
-                    self.ax_graph.set_ylim(0, psi_value * 1.2)
             else:
                 self.text_psi.set_text("NO READING")
                 self.text_psi.set_color('gray')
-                self.data.append(self.data[-1] if self.data else 0)
 
-            self.line.set_ydata(self.data)
+            # Auto-scale Y-axis (the axis is part of the cached background)
+            if max(data) > self.ax_graph.get_ylim()[1]:
+                self.ax_graph.set_ylim(0, max(data) * 1.2)
+                needs_full_draw = True
+
+            self.line.set_ydata(data)
         
         # Redraw
-        plt.pause(0.001)
+        if needs_full_draw:
+            canvas.draw() # Re-caches the background through on_draw
+        else:
+            canvas.restore_region(self.background)
+            self.draw_animated()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        metrics.observe('render', time.perf_counter() - start)
+
+    # Frame rates, dropped frames, hit rate and stage latencies in the bottom left corner
+    def draw_metrics(self, frame):
+
+        snapshot = metrics.snapshot()
+        rates = snapshot['rates']
+        counters = snapshot['counters']
+        processed = counters.get('frames_processed', 0)
+        hit_rate = counters.get('readings', 0) / processed if processed else 0.0
+
+        lines = [
+            f"capture {rates.get('frames_captured', 0):.1f} fps  process {rates.get('frames_processed', 0):.1f} fps"
+            f"  render {rates.get('frames_rendered', 0):.1f} fps",
+            f"dropped {counters.get('frames_dropped', 0)}  hit rate {hit_rate:.0%}"
+        ]
+        for stage in METRIC_STAGES:
+            if stage in snapshot['latency_ms']:
+                p50, p95, _ = snapshot['latency_ms'][stage]
+                lines.append(f"{stage} p50 {p50:.1f} ms  p95 {p95:.1f} ms")
+
+        y = frame.shape[0] - 10 - 20 * (len(lines) - 1)
+        for line in lines:
+            # Dark outline keeps the text readable on a white gauge face
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            y += 20
 
     def close(self):
+        if self.render_timer is not None:
+            self.render_timer.stop()
         plt.close(self.fig)
\ No newline at end of file
@@ -1,7 +1,11 @@
 import json
 import csv
+import queue
+import threading
 import time
 import os
+from rotation import LogRotator, open_segment, segment_paths
+from metrics import metrics
 
 class ConfigManager:
     def __init__(self, config_file='config.json'):
@@ -30,30 +34,191 @@ class ConfigManager:
             print(f"Error loading configuration: {e}")
             return None
 
+    # Per-gauge calibration profiles for multi-gauge mode, keyed by gauge ID.
+    # They are stored under "gauges" and override the top-level (default) values.
+    def load_gauge_profiles(self, config):
+
+        if not config:
+            return {}
+        return {int(gauge_id): profile for gauge_id, profile in config.get('gauges', {}).items()}
+
+    # Store the calibration profile of one gauge and save the whole configuration
+    def save_gauge_profile(self, config, gauge_id, profile):
+
+        config.setdefault('gauges', {})[str(gauge_id)] = profile
+        self.save_config(config)
+
 class DataLogger:
-    def __init__(self, log_file='telemetry_log.csv'):
+    def __init__(self, log_file='telemetry_log.csv', buffered=False, flush_rows=100, flush_interval=1.0, fsync_interval=10.0,
+                 rotate_bytes=0, rotate_interval=0, compress=True):
+        """
+        CSV telemetry log of (Timestamp, PSI) rows.
+
+        With rotate_bytes or rotate_interval set, the log is split into
+        numbered, gzipped segments listed in a manifest (see LogRotator) and
+        earlier segments are kept across restarts. Otherwise log_file is
+        overwritten on startup. Each segment starts with its own header row.
+        Timestamps are seconds since startup, or epoch seconds for a rotated
+        log so they keep increasing across restarts.
+
+        By default every log() call appends one row and closes the file. With
+        buffered=True, log() only puts the row on a queue and a background
+        thread keeps the file open and writes the rows in batches. The file is
+        flushed after flush_rows rows or flush_interval seconds (whichever comes
+        first), fsync'ed every fsync_interval seconds and once more by close().
+        """
         self.log_file = log_file
-        self.start_time = time.time()
+        self.buffered = buffered
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+
+        self.rotator = None
+        if rotate_bytes or rotate_interval:
+            self.rotator = LogRotator(log_file, rotate_bytes, rotate_interval, compress)
+
+        # A rotated log holds many runs, their timestamps must not restart at 0
+        self.start_time = time.time() if self.rotator is None else 0.0
         
-        # Initialize file with headers
+        self._start_file()
+        print(f"Data logging started: {self.log_file}")
+
+        self.rows = None
+        self.writer_thread = None
+        if buffered:
+            self.rows = queue.Queue()
+            self.writer_thread = threading.Thread(target=self._write_rows, daemon=True)
+            self.writer_thread.start()
+
+    # Log elapsed time (or a given timestamp, e.g. video time) and PSI value to CSV
+    def log(self, psi_value, timestamp=None):
+
+        if psi_value is None:
+            return
+
+        with metrics.timer('log'):
+            self._write_row(psi_value, timestamp)
+
+    def _write_row(self, psi_value, timestamp):
+
+        elapsed_time = time.time() - self.start_time if timestamp is None else timestamp
+        row = [f"{elapsed_time:.2f}", f"{psi_value:.2f}"]
+
+        if self.buffered:
+            self.rows.put(row)
+            return
+
         try:
-            with open(self.log_file, 'w', newline='') as f:
+            with open(self.current_file, 'a', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(row)
+                size = f.tell()
+        except Exception as e:
+            print(f"Error logging data: {e}")
+            return
+
+        if self.rotator is not None and self.rotator.should_rotate(size):
+            self._rotate()
+
+    # Write out everything still queued and sync the file to disk
+    def close(self):
+
+        if self.writer_thread is not None:
+            self.rows.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+
+        if self.rotator is not None:
+            # Compress the last segment as well and wait for it
+            self.rotator.finish_segment()
+            self.rotator.close()
+            self.rotator = None
+
+    # Open the log (or its next segment) and write the header
+    def _start_file(self):
+
+        self.current_file = self.rotator.start_segment() if self.rotator is not None else self.log_file
+        try:
+            with open(self.current_file, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow(['Timestamp', 'PSI'])
-            print(f"Data logging started: {self.log_file}")
         except Exception as e:
             print(f"Error initializing log file: {e}")
 
-    # Log elapsed time and PSI value to CSV
-    def log(self, psi_value):
+    # Close the current segment and continue in a new one
+    def _rotate(self):
 
-        if psi_value is None:
-            return
+        self.rotator.finish_segment()
+        self._start_file()
+
+    # Background thread of buffered mode: drain the queue in batches
+    def _write_rows(self):
 
-        elapsed_time = time.time() - self.start_time
         try:
-            with open(self.log_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([f"{elapsed_time:.2f}", f"{psi_value:.2f}"])
+            f = open(self.current_file, 'a', newline='')
         except Exception as e:
-            print(f"Error logging data: {e}")
+            print(f"Error opening log file: {e}")
+            return
+
+        writer = csv.writer(f)
+        unflushed = 0
+        last_flush = last_fsync = time.time()
+        done = False
+
+        while not done:
+            # Wait for the first row of a batch, then take whatever else is queued
+            try:
+                batch = [self.rows.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.flush_rows:
+                try:
+                    batch.append(self.rows.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                # close() was called, everything before it still gets written
+                batch = batch[:batch.index(None)]
+                done = True
+
+            now = time.time()
+            try:
+                writer.writerows(batch)
+                unflushed += len(batch)
+
+                if unflushed and (done or unflushed >= self.flush_rows or now - last_flush >= self.flush_interval):
+                    f.flush()
+                    unflushed = 0
+                    last_flush = now
+
+                if done or now - last_fsync >= self.fsync_interval:
+                    # The OS may keep written data in its cache for a long time,
+                    # fsync makes sure it survives a power cut
+                    f.flush()
+                    os.fsync(f.fileno())
+                    last_fsync = now
+
+                if not done and self.rotator is not None and self.rotator.should_rotate(f.tell()):
+                    # Segments are only handed to the compressor fully synced
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+                    self._rotate()
+                    f = open(self.current_file, 'a', newline='')
+                    writer = csv.writer(f)
+                    unflushed = 0
+            except Exception as e:
+                print(f"Error logging data: {e}")
+
+        f.close()
+
+# Stream the rows of a CSV log as [timestamp, psi] strings, following the
+# manifest of a rotated log through all of its segments in order
+def read_log(log_file='telemetry_log.csv'):
+    paths = segment_paths(log_file) or [log_file]
+    for path in paths:
+        with open_segment(path, 'rt') as f:
+            rows = csv.reader(f)
+            next(rows, None) # Every segment starts with a header
+            yield from rows
@@ -0,0 +1,146 @@
+import bisect
+import numpy as np
+
+# Streaming smoothing filters for PSI readings. Every filter takes one raw
+# sample per update() call and returns the smoothed value; the cost per
+# sample does not grow with the length of the stream.
+
+class MovingAverageFilter:
+    def __init__(self, window=5):
+        """Mean of the last window samples, kept as a ring buffer with a running sum."""
+        self.window = max(1, int(window))
+        self.buffer = np.zeros(self.window)
+        self.count = 0 # Samples seen so far
+        self.total = 0.0
+
+    def update(self, value):
+
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self.total -= self.buffer[slot]
+        self.buffer[slot] = value
+        self.total += value
+        self.count += 1
+
+        # Re-sum now and then so float rounding errors can't pile up
+        if self.count % (self.window * 1000) == 0:
+            self.total = float(self.buffer.sum())
+
+        return float(self.total / min(self.count, self.window))
+
+class ExponentialFilter:
+    def __init__(self, alpha=0.3):
+        """Exponential moving average, alpha is the weight of the newest sample."""
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value):
+
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+class KalmanFilter:
+    def __init__(self, process_noise=0.01, measurement_noise=1.0):
+        """
+        1-D Kalman filter for a slowly drifting value. process_noise is how
+        much the true pressure may change between frames (variance),
+        measurement_noise the variance of a single reading. A higher ratio
+        follows changes faster, a lower one smooths more.
+        """
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.value = None
+        self.variance = 0.0
+
+    def update(self, value):
+
+        if self.value is None:
+            self.value = value
+            self.variance = self.measurement_noise
+            return self.value
+
+        # Predict, then correct with the new reading
+        self.variance += self.process_noise
+        gain = self.variance / (self.variance + self.measurement_noise)
+        self.value += gain * (value - self.value)
+        self.variance *= 1 - gain
+        return self.value
+
+class SavitzkyGolayFilter:
+    def __init__(self, window=7, polyorder=2):
+        """
+        Causal Savitzky-Golay filter: fits a polynomial of polyorder to the
+        last window samples and evaluates it at the newest one. Follows
+        ramps with less lag than a plain mean. Until the window is full the
+        mean of the samples so far is returned.
+        """
+        from scipy.signal import savgol_coeffs
+
+        self.window = max(int(window), polyorder + 1)
+        self.polyorder = polyorder
+        # Coefficients for the last point of the window, oldest sample first
+        self.coeffs = savgol_coeffs(self.window, polyorder, pos=self.window - 1, use='dot')
+        self.buffer = np.zeros(self.window)
+        self.count = 0
+
+    def update(self, value):
+
+        slot = self.count % self.window
+        self.buffer[slot] = value
+        self.count += 1
+
+        if self.count < self.window:
+            return float(self.buffer[:self.count].mean())
+
+        # Rotate the dot product instead of the buffer: oldest sample sits at slot + 1
+        start = self.count % self.window
+        return float(np.dot(self.coeffs[:self.window - start], self.buffer[start:]) +
+                     np.dot(self.coeffs[self.window - start:], self.buffer[:start]))
+
+class MedianFilter:
+    def __init__(self, window=5):
+        """
+        Median of the last window samples, removes single-frame outliers (e.g. a misread needle).
+
+        The samples are also kept sorted: each update bisects to remove the
+        evicted sample and insert the new one, instead of sorting the window.
+        """
+        self.window = max(1, int(window))
+        self.buffer = [] # Samples in arrival order (ring buffer once full)
+        self.ordered = [] # The same samples, sorted
+        self.count = 0
+
+    def update(self, value):
+
+        if len(self.buffer) < self.window:
+            self.buffer.append(value)
+        else:
+            slot = self.count % self.window
+            del self.ordered[bisect.bisect_left(self.ordered, self.buffer[slot])]
+            self.buffer[slot] = value
+        bisect.insort(self.ordered, value)
+        self.count += 1
+
+        ordered = self.ordered
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+# Build a filter by name. Options a filter doesn't use are ignored, so the
+# whole set of smoothing settings from config.json can be passed along.
+def create_filter(name='mean', window=5, alpha=0.3, process_noise=0.01, measurement_noise=1.0, polyorder=2):
+    if name == 'mean':
+        return MovingAverageFilter(window)
+    if name == 'ema':
+        return ExponentialFilter(alpha)
+    if name == 'kalman':
+        return KalmanFilter(process_noise, measurement_noise)
+    if name == 'savgol':
+        return SavitzkyGolayFilter(window, polyorder)
+    if name == 'median':
+        return MedianFilter(window)
+    raise ValueError(f"Unknown smoothing filter: {name} (choose from mean, ema, kalman, savgol, median)")
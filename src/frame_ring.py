@@ -0,0 +1,125 @@
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+# Header layout (int64): write count, slot count, frame height, width, channels, owner pid
+_HEADER_FIELDS = 6
+# Per-slot metadata (int64): frame sequence number, capture time in ns
+_SLOT_FIELDS = 2
+
+class SharedFrameRing:
+    def __init__(self, name=None, shape=None, slots=8, create=False):
+        """
+        Fixed-size ring of preallocated frame buffers in shared memory.
+
+        One writer (the capture process) stores frames into the slots in turn;
+        any number of consumers in other processes attach by name and read the
+        frames as zero-copy NumPy views. Each slot carries the sequence number
+        of the frame it holds, set to 0 while the slot is being rewritten, so
+        a consumer can tell whether a view is still the frame it asked for.
+
+        A view stays valid until the writer wraps around to its slot again,
+        i.e. for about slots frame intervals. Consumers that take longer
+        should check is_current() before trusting the result or copy the
+        frame.
+        """
+        if create:
+            height, width = shape[:2]
+            channels = shape[2] if len(shape) > 2 else 1
+            meta_size = (_HEADER_FIELDS + slots * _SLOT_FIELDS) * 8
+            frame_size = height * width * channels
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=meta_size + slots * frame_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Before Python 3.13 the POSIX resource tracker unlinks every segment a
+            # process opened when it exits; only the creator should remove the ring.
+            # Children of the creator share its tracker and must leave it alone.
+            owner_pid = int(np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)[5])
+            parent = mp.parent_process()
+            if os.name == 'posix' and (parent is None or parent.pid != owner_pid):
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        self.owner = create
+        self.name = self.shm.name
+
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.header[:] = (0, slots, height, width, channels, os.getpid())
+
+        self.slots = int(self.header[1])
+        frame_shape = tuple(int(v) for v in self.header[2:5])
+        if frame_shape[2] == 1:
+            frame_shape = frame_shape[:2]
+
+        self.slot_meta = np.ndarray((self.slots, _SLOT_FIELDS), dtype=np.int64, buffer=self.shm.buf,
+                                    offset=_HEADER_FIELDS * 8)
+        self.frames = np.ndarray((self.slots,) + frame_shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=(_HEADER_FIELDS + self.slots * _SLOT_FIELDS) * 8)
+        if create:
+            self.slot_meta[:] = 0
+
+    # Slot the writer fills next (write_slot/publish are used by the single writer)
+    def write_slot(self):
+
+        seq = int(self.header[0]) + 1
+        slot = (seq - 1) % self.slots
+        self.slot_meta[slot, 0] = 0 # Mark the slot as being rewritten
+        return slot, seq
+
+    # Make a written slot visible to consumers
+    def publish(self, slot, seq, capture_time):
+
+        self.slot_meta[slot, 1] = int(capture_time * 1e9)
+        self.slot_meta[slot, 0] = seq
+        self.header[0] = seq
+
+    # Copy a frame into the next slot and publish it
+    def write(self, frame, capture_time=None):
+
+        slot, seq = self.write_slot()
+        np.copyto(self.frames[slot], frame)
+        self.publish(slot, seq, time.time() if capture_time is None else capture_time)
+        return seq
+
+    # Newest frame as (frame view, sequence number, capture timestamp), or (None, 0, None)
+    def read_latest(self):
+
+        seq = int(self.header[0])
+        if seq == 0:
+            return None, 0, None
+
+        slot = (seq - 1) % self.slots
+        capture_time = self.slot_meta[slot, 1] / 1e9
+        if self.slot_meta[slot, 0] != seq:
+            return None, 0, None # Overwritten in the meantime, caller can retry
+        return self.frames[slot], seq, capture_time
+
+    # Poll until a frame newer than last_seq is published (or timeout seconds pass)
+    def read_new(self, last_seq=0, timeout=None, poll_interval=0.002):
+
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            frame, seq, capture_time = self.read_latest()
+            if frame is not None and seq > last_seq:
+                return True, frame, seq, capture_time
+            if deadline is not None and time.time() >= deadline:
+                return False, None, last_seq, None
+            time.sleep(poll_interval)
+
+    # True while the slot holding frame seq has not been reused by the writer
+    def is_current(self, seq):
+
+        return seq > 0 and self.slot_meta[(seq - 1) % self.slots, 0] == seq
+
+    def close(self):
+
+        # Drop our views before closing the mapping
+        del self.header, self.slot_meta, self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            pass # A caller still holds a frame view, the mapping goes with the process
+        if self.owner:
+            self.shm.unlink()
@@ -1,170 +1,700 @@
+import time
 import cv2
 import numpy as np
-from helpers import calculate_angle, calculate_psi
+from helpers import calculate_angle, calculate_angles, calculate_psi, calculate_psis, select_needle_line
+from filters import create_filter
+from segmentation import create_segmenter
+from metrics import metrics
+
+# Rim sampling pattern used to verify a tracked circle
+_RIM_ANGLES = np.linspace(0, 2 * np.pi, 90, endpoint=False)
+_RIM_COS = np.cos(_RIM_ANGLES)
+_RIM_SIN = np.sin(_RIM_ANGLES)
+_RIM_OFFSETS = np.arange(-4, 5)
+_GRAY_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32) # BGR order
 
 class GaugeReader:
-    def __init__(self, min_angle, max_angle, min_val, max_val, needle_color='red'):
+    def __init__(self, min_angle, max_angle, min_val, max_val, needle_color='red',
+                 track_circle=False, redetect_interval=30, pyramid_width=320,
+                 smoothing='mean', smoothing_options=None, zero_clamp=1.2,
+                 latency_budget=0.0, min_gauge_radius=80, motion_threshold=0, max_stale=1.0,
+                 needle_colors=None, needle_engine='hough'):
         """
         Initialize the GaugeReader with specific calibration for a gauge type.
+
+        needle_color names one of the color presets in segmentation.py (red,
+        black, blue, yellow, white) or a custom color defined in
+        needle_colors, a dict of name -> HSV/BGR/gray ranges.
+
+        needle_engine picks the needle detector: 'hough' finds line segments
+        with HoughLinesP, 'polar' unwraps the needle mask around the center
+        and takes the angle with the most needle pixels in an outer band.
+        The polar engine costs the same regardless of clutter and also
+        handles short or thick needles. Both engines then compare the two
+        ends of the needle and read the one whose needle pixels reach further
+        towards the rim, so a heavy counterweight is not read as the tip.
+
+        When track_circle is enabled the last detected circle is reused on the
+        following frames and only verified with a cheap rim check. A full
+        HoughCircles search runs again every redetect_interval frames or as
+        soon as the rim check fails.
+
+        Full circle searches run coarse-to-fine: candidates are found on a
+        copy downsampled to about pyramid_width pixels wide and refined in a
+        full resolution window. Set pyramid_width to 0 to search the whole
+        frame at native resolution.
+
+        Readings are smoothed with the streaming filter named by smoothing
+        (mean, ema, kalman, savgol or median, see filters.py) configured
+        with smoothing_options. Smoothed readings below zero_clamp are
+        reported as 0.0; set it to 0 to disable the clamp.
+
+        With a latency_budget (seconds per frame) read_frame works on a
+        downscaled copy of each frame. The scale is adjusted after every
+        frame so the average processing time stays under the budget, but
+        the gauge is never shrunk below min_gauge_radius pixels to keep the
+        angle precise. Circles and needle lines are reported in full
+        resolution coordinates. A budget of 0 processes every frame at
+        full size.
+
+        With a motion_threshold read_frame compares a 32x32 grayscale
+        thumbnail of the gauge with the one from the last full read. If no
+        pixel changed by more than motion_threshold gray levels, the
+        previous reading is returned without running detection. A full read
+        is forced at least every max_stale seconds of frame time (the
+        frame_time passed to read_frame, e.g. capture or video time, else
+        the wall clock). 0 disables the check.
         """
         self.min_angle = min_angle
         self.max_angle = max_angle
         self.min_val = min_val
         self.max_val = max_val
         self.needle_color = needle_color
+        self.needle_colors = needle_colors or {}
+        self._segmenters = {} # needle color -> ColorSegmenter
+        self._segmenter(needle_color) # Fail early on an unknown color
+
+        # Needle detector
+        if needle_engine not in ('hough', 'polar'):
+            raise ValueError(f"Unknown needle engine: {needle_engine} (choose from hough, polar)")
+        self.needle_engine = needle_engine
+        self.polar_bins = 720 # Angular resolution of the unwrapped mask (0.5 deg per row)
+        self.polar_band = (0.3, 0.8) # Radii (fraction of r) summed per angle; skips the hub and short tails
+        self.polar_min_coverage = 0.15 # Fraction of the band the needle must fill at its angle
+        self.tip_tolerance = 10 # Degrees around the opposite direction searched for the other end of the needle
+        self.tip_density = 0.7 # Fraction of the radii out to its reach a needle end must fill
         
-        # State variables to smooth jitter (Moving Average)
-        self.psi_history = []
-        self.history_size = 5
+        # Streaming filter to smooth jitter
+        self.psi_filter = create_filter(smoothing, **(smoothing_options or {}))
+        self.zero_clamp = zero_clamp
+
+        # Circle tracking state
+        self.track_circle = track_circle
+        self.redetect_interval = redetect_interval
+        self.track_edge_threshold = 25 # Min intensity step across the rim (0-255)
+        self.track_support_ratio = 0.75 # Fraction of the detection-time rim support required
+        self.last_circle = None
+        self._circle_support_baseline = 0.0
+        self._frames_since_detect = 0
+        self.pyramid_width = pyramid_width
+        self.min_dist_ratio = 0.25 # Min distance between circle centers, as a fraction of width
+
+        # Circular needle masks keyed by (r, crop shape, center in crop)
+        self._mask_cache = {}
+
+        # Adaptive processing resolution
+        self.latency_budget = latency_budget
+        self.min_gauge_radius = min_gauge_radius
+        self.min_scale = 0.25 # Never process frames smaller than this
+        self.scale_step = 0.05 # Scales are multiples of this, so masks and tracking stay stable
+        self.scale = 1.0 # Current processing scale
+        self._latency = None # Smoothed processing time per frame (seconds)
+
+        # Motion gating
+        self.motion_threshold = motion_threshold
+        self.max_stale = max_stale
+        self.motion_size = 32 # Thumbnail width and height
+        self._last_result = None # (calibration, thumbnail, frame time of the read, (circle, needle line))
+        self._last_reading = None # ((calibration, circle, needle line), (psi, raw angle))
 
-    def read_frame(self, frame):
+        # Outcome of the last detect()
+        self.tracked = False # Circle reused instead of searched for
+        self.skipped = False # Whole detection reused by motion gating
+
+    def read_frame(self, frame, annotate=True, frame_time=None):
         """
         Process a single frame (from video or image).
         Returns the calculated PSI value and the processed frame with overlays.
+        With annotate=False no overlay copy is made and None is returned
+        in place of the processed frame.
+        frame_time (seconds) is when the frame was captured, or its
+        position in a video; motion gating measures staleness with it.
+        The gauge circle is left in last_circle and whether it was reused
+        rather than searched for in tracked.
+        """
+
+        with metrics.timer('read_frame'):
+            circle, needle_line = self.detect(frame, frame_time)
+            return self.finish(frame, circle, needle_line, self.skipped, annotate)
+
+    def detect(self, frame, frame_time=None):
+        """
+        Detection half of read_frame: locate the gauge and its needle.
+        Returns (circle, needle_line) in full resolution coordinates, either
+        may be None. Afterwards tracked tells whether the circle was reused
+        (tracking or motion gating) instead of found by a full search, and
+        skipped whether the whole previous detection was reused because the
+        gauge looked unchanged.
         """
 
-        # 1. Pre-processing
+        self.skipped = False
+
+        # Reuse the previous detection while the gauge looks unchanged
+        if frame_time is None:
+            frame_time = time.perf_counter()
+        if self.motion_threshold > 0:
+            cached = self._unchanged_result(frame, frame_time)
+            if cached is not None:
+                self.skipped = True
+                self.tracked = True
+                return cached
+
+        start = time.perf_counter()
+
+        # 0. Work on a downscaled copy when running against a latency budget
+        scale = self.scale if self.latency_budget > 0 else 1.0
+        work = frame
+        if scale < 1.0:
+            work = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+
+        # 1. Locate Gauge (tracked or freshly detected)
+        with metrics.timer('circle_detection'):
+            circle = self._locate_circle(work, scale)
+        
+        if circle is None:
+            self._adapt_scale(time.perf_counter() - start)
+            self._last_result = None
+            return None, None # No gauge found
+
+        # 2. Detect Needle
+        with metrics.timer('needle_detection'):
+            needle_line = self.find_needle_line(work, circle)
+
+        self._adapt_scale(time.perf_counter() - start)
+
+        # Back to full resolution coordinates (the angle is the same at any scale)
+        if scale < 1.0:
+            circle = self.last_circle
+            if needle_line:
+                needle_line = tuple(int(round(v / scale)) for v in needle_line)
+
+        if self.motion_threshold > 0:
+            self._last_result = (self._calibration(), self._motion_thumbnail(frame, circle),
+                                 frame_time, (circle, needle_line))
+
+        return circle, needle_line
+
+    def finish(self, frame, circle, needle_line, skipped=False, annotate=True):
+        """
+        Second half of read_frame for a detect() result: calibration,
+        smoothing, metrics and overlays. skipped marks a detection reused by
+        motion gating, which repeats the last reading instead of feeding the
+        smoothing filter again. Returns (psi, processed frame or None, raw angle).
+        """
+
+        metrics.tick('frames_processed')
+        if skipped:
+            metrics.increment('frames_skipped')
+        if circle is not None:
+            metrics.increment('circles_found')
+
+        psi_val, raw_angle = self.reading(circle, needle_line, repeat=skipped)
+        if psi_val is not None:
+            metrics.increment('readings')
+
+        output_img = self._annotate(frame, circle, needle_line, psi_val) if annotate else None
+        return psi_val, output_img, raw_angle
+
+    # Calibrated, smoothed (psi, raw angle) for a circle and needle line, (None, None) without a needle.
+    # With repeat the previous reading is returned again if it was taken from the same geometry.
+    def reading(self, circle, needle_line, repeat=False):
+
+        key = (self._calibration(), circle, needle_line)
+        if repeat and self._last_reading is not None and self._last_reading[0] == key:
+            return self._last_reading[1]
+
+        psi_val = None
+        raw_angle = None
+        if circle is not None and needle_line:
+            # 3. Math & Calibration
+            cx, cy, _ = circle
+            raw_angle = calculate_angle(needle_line, cx, cy)
+            raw_psi = calculate_psi(raw_angle, self.min_angle, self.max_angle, self.min_val, self.max_val)
+
+            # 4. Signal Smoothing (Jitter Reduction)
+            psi_val = self._smooth(raw_psi)
+
+        self._last_reading = (key, (psi_val, raw_angle))
+        return psi_val, raw_angle
+
+    def read_frames(self, frames):
+        """
+        Process a sequence of frames (e.g. recorded footage) in one call.
+        Detection still runs per frame, but angle and PSI conversion run as
+        array operations over the whole batch. Smoothing is applied in frame
+        order, exactly as successive read_frame calls would.
+        Returns arrays of PSI values and raw angles, NaN where no reading.
+        """
+
+        lines = []
+        centers = []
+
+        for frame in frames:
+            line = None
+            circle = self._locate_circle(frame)
+            if circle is not None:
+                line = self.find_needle_line(frame, circle)
+            
+            if line is None:
+                lines.append((np.nan, np.nan, np.nan, np.nan))
+                centers.append((np.nan, np.nan))
+            else:
+                lines.append(line)
+                centers.append(circle[:2])
+
+        lines = np.array(lines, dtype=np.float64).reshape(-1, 4)
+        centers = np.array(centers, dtype=np.float64).reshape(-1, 2)
+
+        # Math & Calibration for the whole batch
+        raw_angles = calculate_angles(lines, centers[:, 0], centers[:, 1])
+        raw_psis = calculate_psis(raw_angles, self.min_angle, self.max_angle, self.min_val, self.max_val)
+
+        # Smoothing depends on history, so it stays sequential
+        psi_values = np.full(len(raw_psis), np.nan)
+        for i in np.flatnonzero(~np.isnan(raw_psis)):
+            psi_values[i] = self._smooth(float(raw_psis[i]))
+
+        return psi_values, raw_angles
+
+    # Copy of the frame with the gauge boundary, needle and reading drawn on it
+    def _annotate(self, frame, circle, needle_line, psi_val):
+
+        output_img = frame.copy()
+        if circle is None:
+            return output_img
+
+        cx, cy, r = circle
+        
+        # Draw Gauge Boundary
+        cv2.circle(output_img, (cx, cy), r, (0, 255, 0), 3)
+        cv2.circle(output_img, (cx, cy), 5, (0, 0, 255), -1)
+
+        if needle_line:
+            x1, y1, x2, y2 = (int(round(v)) for v in needle_line)
+            cv2.line(output_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
+
+        if psi_val is not None:
+            # Draw Text
+            cv2.putText(output_img, f"{psi_val} PSI", (cx - 40, cy + int(r/2)), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
+
+        return output_img
+
+    # Smoothing filter over the readings with a zero clamp
+    def _smooth(self, raw_psi):
+
+        psi_val = round(self.psi_filter.update(raw_psi), 1)
+
+        # If the reading is effectively zero (e.g., < 2% of range), force it to 0.0
+        # This kills the "0.6, 0.8, 0.5" noise.
+        if psi_val < self.zero_clamp:
+            psi_val = 0.0
+
+        return psi_val
+
+    # Settings that change what a reading means; a cached reading is only valid for the same ones
+    def _calibration(self):
+
+        return (self.min_angle, self.max_angle, self.min_val, self.max_val, self.needle_color)
+
+    # Small grayscale copy of the gauge's bounding box for change detection.
+    # Striding the crop first keeps the area resize cheap (~0.3 ms at 720p).
+    def _motion_thumbnail(self, frame, circle):
+
+        cx, cy, r = circle
+        step = max(1, (2 * r) // (self.motion_size * 4))
+        crop = frame[max(cy - r, 0):cy + r + 1:step, max(cx - r, 0):cx + r + 1:step]
+        small = cv2.resize(crop, (self.motion_size, self.motion_size), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    # The last full reading if the gauge hasn't changed since, else None
+    def _unchanged_result(self, frame, frame_time):
+
+        if self._last_result is None:
+            return None
+
+        calibration, thumbnail, read_time, result = self._last_result
+        # Staleness in frame time, so replays faster than real time still re-read on schedule.
+        # A clock going backwards (new video, different source) also forces a read.
+        age = frame_time - read_time
+        if calibration != self._calibration() or not 0 <= age < self.max_stale:
+            return None
+
+        diff = cv2.absdiff(self._motion_thumbnail(frame, result[0]), thumbnail)
+        if diff.max() > self.motion_threshold:
+            return None
+        return result
+
+    # Pick the processing scale for the next frame from the measured latency
+    def _adapt_scale(self, elapsed):
+
+        if self.latency_budget <= 0:
+            return
+
+        if self._latency is None:
+            self._latency = elapsed
+        else:
+            self._latency += 0.2 * (elapsed - self._latency)
+
+        # Keep the gauge at least min_gauge_radius pixels across
+        lower = self.min_scale
+        if self.last_circle is not None:
+            lower = max(lower, min(1.0, self.min_gauge_radius / max(self.last_circle[2], 1)))
+
+        # Processing time grows roughly with the pixel count, i.e. the square of the scale
+        step = self.scale_step
+        scale = self.scale
+        if self._latency > self.latency_budget:
+            scale = np.floor(scale * np.sqrt(self.latency_budget / self._latency) / step) * step
+        elif self._latency * ((scale + step) / scale) ** 2 < self.latency_budget * 0.9:
+            scale += step
+
+        scale = round(float(min(1.0, max(lower, scale))), 3)
+        if scale != self.scale:
+            # Carry the latency estimate over to the new scale
+            self._latency *= (scale / self.scale) ** 2
+            self.scale = scale
+            # Rim support depends on the scale, take a new tracking baseline on the next frame
+            self._circle_support_baseline = None
+
+    # Multiply a (cx, cy, r) circle by scale
+    def _scale_circle(self, circle, scale):
+
+        if scale == 1.0:
+            return circle
+        return tuple(int(round(v * scale)) for v in circle)
+
+    # Return the gauge circle for this frame, reusing the tracked one when possible.
+    # frame may be downscaled by scale; last_circle is kept at full resolution.
+    def _locate_circle(self, frame, scale=1.0):
+
+        if self.track_circle and self.last_circle is not None:
+            self._frames_since_detect += 1
+            if self._frames_since_detect < self.redetect_interval:
+                cx, cy, r = self._scale_circle(self.last_circle, scale)
+                support = self._circle_support(frame, cx, cy, r)
+                if self._circle_support_baseline is None:
+                    # First frame at a new scale, the circle was verified on the previous one
+                    self._circle_support_baseline = support
+                if support >= self._circle_support_baseline * self.track_support_ratio:
+                    self.tracked = True
+                    return (cx, cy, r)
+
+        self.tracked = False
+        circle = self._detect_circle(frame)
+        self._frames_since_detect = 0
+        self.last_circle = self._scale_circle(circle, 1 / scale) if circle is not None else None
+        if circle is not None and self.track_circle:
+            self._circle_support_baseline = self._circle_support(frame, *circle)
+
+        return circle
+
+    # Full circle search over the whole frame
+    def _detect_circle(self, frame):
+
+        circles = self._detect_circles(frame)
+        return circles[0] if circles else None
+
+    # Full circle search returning up to max_circles (cx, cy, r), strongest first
+    def _detect_circles(self, frame, max_circles=1):
+
+        # Pre-processing
         height, width = frame.shape[:2]
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Coarse-to-fine search when the frame is large enough to downsample
+        if self.pyramid_width and width >= 2 * self.pyramid_width:
+            return self._detect_circles_pyramid(gray, max_circles)
+
         blur = cv2.GaussianBlur(gray, (9, 9), 2)
         
         # Dynamic Resolution Logic (Normalization)
-        min_dist = int(width * 0.25)
+        min_dist = int(width * self.min_dist_ratio)
         min_radius = int(width * 0.05) # Reduced from 0.15 to 0.05 to detect smaller gauges
         
-        # 2. Detect Circle
+        # Detect Circle
         circles = cv2.HoughCircles(
             blur, cv2.HOUGH_GRADIENT, dp=1, minDist=min_dist, 
             param1=80, param2=90, minRadius=min_radius, maxRadius=0
         )
         
-        output_img = frame.copy()
+        return self._to_circle_list(circles)[:max_circles]
+
+    # Find candidates on a downsampled image, then refine them at full resolution
+    def _detect_circles_pyramid(self, gray, max_circles=1):
+
+        height, width = gray.shape[:2]
+        min_radius = int(width * 0.05)
+
+        # 1. Coarse search: halve the image until it reaches the target width
+        small = gray
+        scale = 1
+        while small.shape[1] // 2 >= self.pyramid_width:
+            small = cv2.pyrDown(small)
+            scale *= 2
+
+        small_width = small.shape[1]
+        small_blur = cv2.GaussianBlur(small, (5, 5), 1) # pyrDown already smoothed the image
         
+        # A circle leaves ~1/scale as many edge votes, so lower the accumulator threshold
+        candidates = cv2.HoughCircles(
+            small_blur, cv2.HOUGH_GRADIENT, dp=1, minDist=int(small_width * self.min_dist_ratio),
+            param1=80, param2=max(90 * 1.5 / scale, 20),
+            minRadius=int(small_width * 0.05), maxRadius=0
+        )
+
+        if candidates is None:
+            return []
+
+        # 2. Fine search: full resolution Hough restricted to a window around each candidate.
+        # The coarse radius can lock onto an inner ring, so the window spans 1.5x that radius;
+        # inside it the radius range is the native one, which keeps the result identical
+        # to a full frame search (a narrower range moves the center on real gauges).
+        found = []
+        min_dist = width * self.min_dist_ratio
+        for coarse_x, coarse_y, coarse_r in candidates[0, :, :3] * scale:
+            max_radius = int(coarse_r * 1.5) + 2 * scale
+            margin = max_radius + 2 * scale
+
+            x0 = max(int(coarse_x) - margin, 0)
+            y0 = max(int(coarse_y) - margin, 0)
+            x1 = min(int(coarse_x) + margin + 1, width)
+            y1 = min(int(coarse_y) + margin + 1, height)
+            window = cv2.GaussianBlur(gray[y0:y1, x0:x1], (9, 9), 2)
+
+            circles = cv2.HoughCircles(
+                window, cv2.HOUGH_GRADIENT, dp=1, minDist=max(window.shape),
+                param1=80, param2=90, minRadius=min_radius, maxRadius=max_radius
+            )
+
+            if circles is None:
+                continue
+
+            circles[0, :, 0] += x0
+            circles[0, :, 1] += y0
+            cx, cy, r = self._to_circle_list(circles)[0]
+
+            # Two coarse candidates can refine onto the same gauge
+            if any((cx - fx)**2 + (cy - fy)**2 < min_dist**2 for fx, fy, _ in found):
+                continue
+
+            found.append((cx, cy, r))
+            if len(found) >= max_circles:
+                break
+
+        return found
+
+    # Convert HoughCircles output to a list of integer (cx, cy, r), strongest first
+    def _to_circle_list(self, circles):
+
         if circles is None:
-            return None, output_img, None # No gauge found
+            return []
 
-        # Take the strongest circle found
         circles = np.uint16(np.around(circles))
-        target = circles[0, 0]
-        cx, cy, r = target[0], target[1], target[2]
-        
-        # Draw Gauge Boundary
-        cv2.circle(output_img, (cx, cy), r, (0, 255, 0), 3)
-        cv2.circle(output_img, (cx, cy), 5, (0, 0, 255), -1)
-        
-        # 3. Detect Needle
-        needle_line = self._find_needle_line(frame, cx, cy, r)
-        
-        psi_val = None
-        raw_angle = None
-        
-        if needle_line:
-            x1, y1, x2, y2 = needle_line
-            cv2.line(output_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            
-            # 4. Math & Calibration
-            raw_angle = calculate_angle(needle_line, cx, cy)
-            raw_psi = calculate_psi(raw_angle, self.min_angle, self.max_angle, self.min_val, self.max_val)
-            
-            # 5. Signal Smoothing (Jitter Reduction)
-            self.psi_history.append(raw_psi)
-            if len(self.psi_history) > self.history_size:
-                self.psi_history.pop(0)
-            psi_val = round(sum(self.psi_history) / len(self.psi_history), 1)
-
-            # If the reading is effectively zero (e.g., < 2% of range), force it to 0.0
-            # This kills the "0.6, 0.8, 0.5" noise.
-            if psi_val < 1.2:
-                psi_val = 0.0
-                
-            # Draw Text
-            cv2.putText(output_img, f"{psi_val} PSI", (cx - 40, cy + int(r/2)), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
+        return [(int(cx), int(cy), int(r)) for cx, cy, r in circles[0, :, :3]]
 
-        return psi_val, output_img, raw_angle
+    # Fraction of rim sample points showing a strong radial intensity step.
+    # Only ~800 pixels are touched, so this is far cheaper than HoughCircles.
+    def _circle_support(self, frame, cx, cy, r):
 
-    # Find the needle line in the frame
-    def _find_needle_line(self, frame, cx, cy, r):
+        height, width = frame.shape[:2]
+        radii = (r + _RIM_OFFSETS)[:, None]
+        xs = np.clip(np.rint(cx + radii * _RIM_COS), 0, width - 1).astype(np.intp)
+        ys = np.clip(np.rint(cy - radii * _RIM_SIN), 0, height - 1).astype(np.intp)
 
-        # Masking to isolate gauge area
-        mask = np.zeros(frame.shape[:2], dtype="uint8")
+        # Sample BGR pixels and convert to grayscale: shape (offsets, angles)
+        samples = frame[ys, xs].astype(np.float32)
+        if samples.ndim == 3:
+            samples = samples @ _GRAY_WEIGHTS
 
-        cv2.circle(mask, (cx, cy), int(r * 1.0), 255, -1) 
-        roi = cv2.bitwise_and(frame, frame, mask=mask)
-        
-        needle_mask = None
+        # Strongest radial step at each angle
+        steps = np.abs(samples[2:] - samples[:-2]).max(axis=0)
+        return float(np.mean(steps > self.track_edge_threshold))
+
+    # Find the needle line (x1, y1, x2, y2) of the gauge at circle, None if there is none
+    def find_needle_line(self, frame, circle):
+
+        cx, cy, r = circle
+
+        # Masking to isolate gauge area
+        roi, mask, x0, y0 = self._needle_roi(frame, cx, cy, r)
         
-        if self.needle_color == 'black':
-            # Color Thresholding for BLACK NEEDLE
-            # Convert to Grayscale
-            gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            # Inverse threshold: Dark pixels become white (255)
-            _, needle_mask = cv2.threshold(gray_roi, 80, 255, cv2.THRESH_BINARY_INV)
-            # Apply the circular mask again
-            needle_mask = cv2.bitwise_and(needle_mask, needle_mask, mask=mask)
-            
-        elif self.needle_color == 'blue':
-            # Color Thresholding for BLUE NEEDLE
-            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-            
-            lower_blue = np.array([100, 150, 50])
-            upper_blue = np.array([140, 255, 255])
-            needle_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-            
-        else: # Default to 'red'
-            # Color Thresholding for RED NEEDLE
-            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-            
-            # Lower Red Mask (0-10)
-            lower1 = np.array([0, 100, 100])
-            upper1 = np.array([10, 255, 255])
-            mask1 = cv2.inRange(hsv, lower1, upper1)
-            
-            # Upper Red Mask (170-180)
-            lower2 = np.array([170, 100, 100])
-            upper2 = np.array([180, 255, 255])
-            mask2 = cv2.inRange(hsv, lower2, upper2)
-            
-            # Combine them
-            needle_mask = cv2.bitwise_or(mask1, mask2)
+        # Work in crop coordinates from here on
+        cx, cy = cx - x0, cy - y0
+
+        # Color Thresholding
+        needle_mask = self._needle_mask(roi, mask)
+
+        # Rows are angles (clockwise on screen, since y points down), columns are radii
+        polar = cv2.warpPolar(needle_mask, (r, self.polar_bins), (cx, cy), r, cv2.WARP_POLAR_LINEAR + cv2.INTER_LINEAR)
+
+        if self.needle_engine == 'polar':
+            angle = self._polar_needle_angle(polar, r)
+            if angle is None: return None
+
+            # Hub to rim at the measured angle; float coordinates keep the sub-degree angle
+            theta = np.radians(angle)
+            return (float(cx + x0), float(cy + y0),
+                    float(cx + x0 + r * np.cos(theta)), float(cy + y0 - r * np.sin(theta)))
         
         # 3. Line Detection 
-        lines = cv2.HoughLinesP(
-            needle_mask, rho=1, theta=np.pi / 180, threshold=15, 
-            minLineLength=int(r * 0.10), maxLineGap=int(r * 0.10)
-        )
+        lines = self._needle_lines(needle_mask, r)
         
         if lines is None: return None
         
-       # 4. Filter for "Best Reach" 
-        best_line = None
-        max_reach = 0 # We want the line that reaches closest to the edge (radius)
-        
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            
-            # Calculate distance from center to line
-            num = abs((y2 - y1) * cx - (x2 - x1) * cy + x2 * y1 - y2 * x1)
-            den = np.sqrt((y2 - y1)**2 + (x2 - x1)**2)
-            if den == 0 or (num / den) > 15: 
-                continue 
+        # 4. Filter for "Best Reach" (closest to the edge while passing through the hub)
+        best_line = select_needle_line(lines, cx, cy, r)
+        if best_line is None: return None
+
+        # 5. The line may be the counterweight. A thin tip rarely gives a segment that
+        # passes the hub test, so measure the tip side in the unwrapped mask instead.
+        angle = calculate_angle(best_line, cx, cy)
+        if self._tip_is_opposite(polar, r, angle):
+            angle = self._polar_needle_angle(polar, r, near=angle + 180)
+            if angle is None: return None
+            theta = np.radians(angle)
+            return (float(cx + x0), float(cy + y0),
+                    float(cx + x0 + r * np.cos(theta)), float(cy + y0 - r * np.sin(theta)))
         
-            # Calculate how far each endpoint is from the center hub
-            dist1 = np.sqrt((x1 - cx)**2 + (y1 - cy)**2)
-            dist2 = np.sqrt((x2 - cx)**2 + (y2 - cy)**2)
-            
-            # Finds which end is furthest out
-            current_tip_dist = max(dist1, dist2)
-            
-            # If the CLOSEST point is too far from center (>30% radius), 
-            # it's probably floating text, not the needle.
-            closest_dist = min(dist1, dist2)
-            if closest_dist > (r * 0.30):
-                continue
+        # Map line coordinates back to frame space
+        x1, y1, x2, y2 = best_line
+        return (x1 + x0, y1 + y0, x2 + x0, y2 + y0)
+
+    # Needle angle (degrees, counter-clockwise from +x) from the unwrapped needle mask,
+    # or None. near limits the search to tip_tolerance degrees around an angle.
+    def _polar_needle_angle(self, polar, r, near=None):
+
+        bins = self.polar_bins
+        band = polar[:, int(r * self.polar_band[0]):int(r * self.polar_band[1])]
+        profile = cv2.reduce(band, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[:, 0].astype(np.float64)
+
+        rows = np.arange(bins) if near is None else self._polar_rows(near, self.tip_tolerance)
+        peak = int(rows[np.argmax(profile[rows])])
+        if profile[peak] < 255 * band.shape[1] * self.polar_min_coverage:
+            return None
+
+        # A heavy counterweight can outweigh the tip, use the strongest angle on the tip side
+        if near is None and self._tip_is_opposite(polar, r, self._polar_angle(peak)):
+            return self._polar_needle_angle(polar, r, near=self._polar_angle(peak) + 180)
+
+        # Centroid of the run of rows above half the peak: sub-row precise and
+        # centered on thick needles too. Roll the peak to the middle so the run
+        # doesn't wrap around 0/360.
+        shift = bins // 2 - peak
+        rolled = np.roll(profile, shift)
+        above = rolled >= rolled[bins // 2] / 2
+        if above.all():
+            return None
+        left = bins // 2 - int(np.argmin(above[bins // 2::-1])) + 1
+        right = bins // 2 + int(np.argmin(above[bins // 2:]))
+        weights = rolled[left:right]
+        row = np.dot(np.arange(left, right), weights) / weights.sum() - shift
+
+        return self._polar_angle(row)
+
+    # warpPolar measures clockwise on screen, our angles run counter-clockwise
+    def _polar_angle(self, row):
+
+        return (360 - row * 360 / self.polar_bins) % 360
+
+    # Rows of the unwrapped mask within tolerance degrees of an angle
+    def _polar_rows(self, angle, tolerance):
+
+        bins = self.polar_bins
+        row = int(round((360 - angle) * bins / 360))
+        half = int(round(tolerance * bins / 360))
+        return np.arange(row - half, row + half + 1) % bins
+
+    # True when the needle reaches further towards the rim opposite to angle, i.e.
+    # angle points along the counterweight. The tip is the end whose solid run of
+    # needle pixels extends furthest out; ticks and numbers near the rim are too
+    # sparse to extend a run. Each end is searched within tip_tolerance degrees,
+    # since a slightly off center makes the two halves of the needle less than 180 apart.
+    def _tip_is_opposite(self, polar, r, angle):
+
+        return self._needle_reach(polar, r, angle + 180) > self._needle_reach(polar, r, angle)
+
+    # Furthest radius out to which needle pixels fill at least tip_density of the band
+    # (from polar_band[0] * r), best over the angles within tip_tolerance of angle
+    def _needle_reach(self, polar, r, angle):
+
+        start, stop = int(r * self.polar_band[0]), int(r * self.polar_band[1])
+        rows = self._polar_rows(angle, self.tip_tolerance)
+
+        # Needle pixels per angle, over +-1 degree so thin needles between rows count
+        spread = self._polar_rows(0, 1)
+        neighbours = (rows[:, None] + spread[None, :]) % self.polar_bins
+        filled = polar[neighbours, start:stop].max(axis=1) >= 128
+
+        density = np.cumsum(filled, axis=1) / np.arange(1, stop - start + 1)
+        solid = filled & (density >= self.tip_density)
+        reach = np.where(solid.any(axis=1), stop - start - np.argmax(solid[:, ::-1], axis=1), 0)
+        return int(reach.max())
+
+    # Crop to the gauge bounding box and black out everything outside the circle.
+    # Returns the masked crop, the circle mask and the crop offset.
+    def _needle_roi(self, frame, cx, cy, r):
+
+        height, width = frame.shape[:2]
+        x0, y0 = max(cx - r, 0), max(cy - r, 0)
+        x1, y1 = min(cx + r + 1, width), min(cy + r + 1, height)
+        crop = frame[y0:y1, x0:x1]
+
+        mask = self._circle_mask(r, crop.shape[:2], cx - x0, cy - y0)
+        roi = cv2.bitwise_and(crop, crop, mask=mask)
+        return roi, mask, x0, y0
+
+    # Binary mask of the pixels matching the needle color
+    def _needle_mask(self, roi, mask):
+
+        return self._segmenter(self.needle_color).segment(roi, mask)
+
+    # Lookup-table segmenter for a needle color, compiled on first use
+    def _segmenter(self, needle_color):
+
+        segmenter = self._segmenters.get(needle_color)
+        if segmenter is None:
+            segmenter = create_segmenter(needle_color, self.needle_colors)
+            self._segmenters[needle_color] = segmenter
+        return segmenter
+
+    # Line segments in the needle mask, as returned by HoughLinesP (or None)
+    def _needle_lines(self, needle_mask, r):
+
+        return cv2.HoughLinesP(
+            needle_mask, rho=1, theta=np.pi / 180, threshold=15, 
+            minLineLength=int(r * 0.10), maxLineGap=int(r * 0.10)
+        )
+
+    # Filled circle mask for a crop, cached since the gauge rarely moves
+    def _circle_mask(self, r, shape, cx, cy):
 
-            # Pick the line that extends furthest towards the edge
-            if current_tip_dist > max_reach:
-                max_reach = current_tip_dist
-                best_line = (x1, y1, x2, y2)
-                
-        return best_line
\ No newline at end of file
+        key = (r, shape, cx, cy)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            if len(self._mask_cache) >= 32:
+                self._mask_cache.clear()
+            mask = np.zeros(shape, dtype="uint8")
+            cv2.circle(mask, (cx, cy), int(r * 1.0), 255, -1)
+            self._mask_cache[key] = mask
+        return mask
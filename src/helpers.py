@@ -26,6 +26,61 @@ def calculate_angle(line, center_x, center_y):
         
     return angle_deg
 
+# Vectorized calculate_angle for an (N, 4) array of lines. The center can be a
+# scalar or one value per line. Rows of NaN (no needle found) give NaN angles.
+def calculate_angles(lines, center_x, center_y):
+
+    lines = np.asarray(lines, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = lines.T
+    dist1 = np.sqrt((x1 - center_x)**2 + (y1 - center_y)**2)
+    dist2 = np.sqrt((x2 - center_x)**2 + (y2 - center_y)**2)
+
+    # The tip is the endpoint furthest from the center
+    tip_first = dist1 > dist2
+    tip_x = np.where(tip_first, x1, x2)
+    tip_y = np.where(tip_first, y1, y2)
+
+    delta_y = center_y - tip_y
+    delta_x = tip_x - center_x
+
+    angle_deg = np.degrees(np.arctan2(delta_y, delta_x))
+    return np.where(angle_deg < 0, angle_deg + 360, angle_deg)
+
+# Pick the needle from HoughLinesP output: the line that passes close to the center
+# hub and reaches furthest towards the rim. Vectorized over all (N, 1, 4) lines.
+def select_needle_line(lines, center_x, center_y, radius, max_center_dist=15, max_hub_ratio=0.30):
+
+    if lines is None or len(lines) == 0:
+        return None
+
+    x1, y1, x2, y2 = lines.reshape(-1, 4).astype(np.float64).T
+    dx = x2 - x1
+    dy = y2 - y1
+
+    # Distance from center to each line
+    num = np.abs(dy * center_x - dx * center_y + x2 * y1 - y2 * x1)
+    den = np.sqrt(dy**2 + dx**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center_dist = num / den
+
+    # Distance of each endpoint from the center hub
+    dist1 = np.sqrt((x1 - center_x)**2 + (y1 - center_y)**2)
+    dist2 = np.sqrt((x2 - center_x)**2 + (y2 - center_y)**2)
+    tip_dist = np.maximum(dist1, dist2)
+    closest_dist = np.minimum(dist1, dist2)
+
+    # Lines that miss the hub, or whose closest point is far from the center
+    # (floating text), are not the needle
+    valid = (den != 0) & (center_dist <= max_center_dist) & (closest_dist <= radius * max_hub_ratio)
+    valid &= tip_dist > 0
+
+    if not valid.any():
+        return None
+
+    # First line that extends furthest towards the edge
+    best = np.argmax(np.where(valid, tip_dist, -1.0))
+    return tuple(int(v) for v in lines.reshape(-1, 4)[best])
+
 # Calculate PSI based on needle angle and calibration
 def calculate_psi(current_angle, start_angle, end_angle, min_val, max_val):
     """
@@ -66,4 +121,31 @@ def calculate_psi(current_angle, start_angle, end_angle, min_val, max_val):
     # 4. Map to PSI
     psi = min_val + (percentage * (max_val - min_val))
     
-    return round(psi, 1)
\ No newline at end of file
+    return round(psi, 1)
+
+# Vectorized calculate_psi for an array of angles, with the same dead zone clamp.
+# NaN angles give NaN readings.
+def calculate_psis(current_angles, start_angle, end_angle, min_val, max_val):
+
+    current_angles = np.asarray(current_angles, dtype=np.float64)
+
+    # 1. Calculate the total "arc" of the gauge
+    diff_total = start_angle - end_angle
+    if diff_total < 0:
+        diff_total += 360
+
+    # 2. Calculate how far each needle reading has traveled
+    diff_current = start_angle - current_angles
+    diff_current = np.where(diff_current < 0, diff_current + 360, diff_current)
+
+    # 3. Calculate Percentage and map to PSI
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = diff_current / diff_total
+    psi = np.round(min_val + (percentage * (max_val - min_val)), 1)
+
+    # Deadzone logic: clamp to whichever end of the scale is closer
+    dead_zone = 360 - diff_total
+    dist_from_max = diff_current - diff_total
+    clamped = np.where(dist_from_max < (dead_zone / 2), max_val, min_val)
+
+    return np.where(diff_current > diff_total, clamped, psi)
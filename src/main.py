@@ -1,14 +1,18 @@
+import argparse
 import cv2
 import os
-import matplotlib.pyplot as plt
+import signal
+import threading
 from gauge import GaugeReader
-from dashboard import Dashboard
+from multi_gauge import MultiGaugeReader
+from pipeline import ProcessingPipeline
 from data_manager import ConfigManager, DataLogger
-from camera import ThreadedCamera
+from binary_log import BinaryLogger
+from camera import SharedMemoryCamera, ThreadedCamera
+from metrics import metrics, start_http_server
 
-def run_live_demo():
-    # Load Configuration on startup
-    config_manager = ConfigManager()
+# Load Configuration, default values are used for anything missing
+def load_current_config(config_manager):
     config = config_manager.load_config()
     
     # Default values if no config exists
@@ -17,7 +21,42 @@ def run_live_demo():
         'max_angle': 0,
         'min_psi': 0,
         'max_psi': 100,
-        'needle_color': 'red'
+        'needle_color': 'red',
+        'needle_colors': {},
+        'needle_engine': 'hough',
+        'track_circle': True,
+        'redetect_interval': 30,
+        'pyramid_width': 320,
+        'multi_gauge': False,
+        'max_gauges': 6,
+        'gauge_workers': 4,
+        'workers': 0,
+        'queue_size': 4,
+        'shared_memory': False,
+        'shared_memory_name': 'gauge_frames',
+        'ring_slots': 8,
+        'render_fps': 15,
+        'buffered_logging': True,
+        'log_flush_rows': 100,
+        'log_flush_interval': 1.0,
+        'log_fsync_interval': 10.0,
+        'log_format': 'csv',
+        'log_rotate_mb': 0,
+        'log_rotate_minutes': 0,
+        'log_compress': True,
+        'smoothing': 'mean',
+        'smoothing_window': 5,
+        'smoothing_alpha': 0.3,
+        'kalman_process_noise': 0.01,
+        'kalman_measurement_noise': 1.0,
+        'savgol_polyorder': 2,
+        'zero_clamp': 1.2,
+        'latency_budget_ms': 0,
+        'min_gauge_radius': 80,
+        'motion_threshold': 8,
+        'motion_max_stale': 1.0,
+        'metrics_port': 0,
+        'metrics_overlay': False
     }
     
     if config:
@@ -26,31 +65,161 @@ def run_live_demo():
     else:
         print("No configuration found. Please calibrate the gauge.")
 
-    # Initialize Gauge Reader (OpenCV Processing)
-    reader = GaugeReader(
+    return current_config
+
+# Options for the smoothing filter (see filters.py)
+def smoothing_options(current_config):
+    return {
+        'window': current_config['smoothing_window'],
+        'alpha': current_config['smoothing_alpha'],
+        'process_noise': current_config['kalman_process_noise'],
+        'measurement_noise': current_config['kalman_measurement_noise'],
+        'polyorder': current_config['savgol_polyorder']
+    }
+
+# Initialize Gauge Reader (OpenCV Processing)
+def create_reader(current_config):
+    return GaugeReader(
         current_config['min_angle'], 
         current_config['max_angle'], 
         current_config['min_psi'], 
         current_config['max_psi'], 
-        needle_color=current_config['needle_color']
+        needle_color=current_config['needle_color'],
+        needle_colors=current_config['needle_colors'],
+        needle_engine=current_config['needle_engine'],
+        track_circle=current_config['track_circle'],
+        redetect_interval=current_config['redetect_interval'],
+        pyramid_width=current_config['pyramid_width'],
+        smoothing=current_config['smoothing'],
+        smoothing_options=smoothing_options(current_config),
+        zero_clamp=current_config['zero_clamp'],
+        latency_budget=current_config['latency_budget_ms'] / 1000,
+        min_gauge_radius=current_config['min_gauge_radius'],
+        motion_threshold=current_config['motion_threshold'],
+        max_stale=current_config['motion_max_stale']
     )
+
+# Initialize Data Logger, buffered mode writes from a background thread.
+# The file extension follows log_format unless log_file is given.
+def create_logger(current_config, log_file=None, name='telemetry_log'):
+    # Rotation splits the log into compressed segments for 24/7 operation
+    rotation = {
+        'rotate_bytes': int(current_config['log_rotate_mb'] * 1024 * 1024),
+        'rotate_interval': current_config['log_rotate_minutes'] * 60,
+        'compress': current_config['log_compress']
+    }
+    if current_config['log_format'] == 'binary':
+        return BinaryLogger(
+            log_file or f"{name}.bin",
+            flush_interval=current_config['log_flush_interval'],
+            fsync_interval=current_config['log_fsync_interval'],
+            **rotation
+        )
+    return DataLogger(
+        log_file or f"{name}.csv",
+        buffered=current_config['buffered_logging'],
+        flush_rows=current_config['log_flush_rows'],
+        flush_interval=current_config['log_flush_interval'],
+        fsync_interval=current_config['log_fsync_interval'],
+        **rotation
+    )
+
+# Log one processed frame. The CSV log only keeps readings, the binary log
+# also keeps frames without one along with the frame and detection details.
+def log_reading(logger, psi, raw_angle=None, seq=0, frame_time=None, circle=None, tracked=False):
+    if isinstance(logger, BinaryLogger):
+        logger.log(psi, timestamp=frame_time, seq=seq, raw_angle=raw_angle, circle=circle, tracked=tracked)
+    elif psi is not None:
+        logger.log(psi)
+
+# Frames the camera captured while processing was busy are never read
+def count_dropped(last_seq, seq):
+    if last_seq and seq > last_seq + 1:
+        metrics.increment('frames_dropped', seq - last_seq - 1)
+
+# Serve the runtime metrics (stage latencies, frame rates) for Prometheus
+def start_metrics(current_config):
+    if current_config['metrics_port']:
+        start_http_server(current_config['metrics_port'])
+
+# Start the webcam feed
+def open_camera(current_config):
+    if current_config['shared_memory']:
+        # Other processes (recorder, preview) can attach to the same frames by name
+        video_stream = SharedMemoryCamera(0, slots=current_config['ring_slots'],
+                                          name=current_config['shared_memory_name']).start()
+        print(f"Publishing frames to shared memory: {video_stream.name}")
+        return video_stream
+    return ThreadedCamera(0).start()
+
+def run_live_demo():
+    # GUI libraries are only loaded when the dashboard is used
+    import matplotlib.pyplot as plt
+    from dashboard import Dashboard
+
+    # Load Configuration on startup
+    config_manager = ConfigManager()
+    current_config = load_current_config(config_manager)
+
+    # Initialize Gauge Reader (OpenCV Processing)
+    reader = create_reader(current_config)
     
-    logger = DataLogger()
+    # Multi-gauge mode reads every gauge in view, each with its own calibration profile
+    multi_reader = None
+    gauge_loggers = {}
+    primary_gauge = None # Gauge shown on (and calibrated from) the dashboard
+    
+    if current_config['multi_gauge']:
+        multi_reader = MultiGaugeReader(
+            profiles=config_manager.load_gauge_profiles(current_config),
+            default_profile=current_config,
+            max_gauges=current_config['max_gauges'],
+            max_workers=current_config['gauge_workers'],
+            redetect_interval=current_config['redetect_interval'],
+            pyramid_width=current_config['pyramid_width'],
+            smoothing=current_config['smoothing'],
+            smoothing_options=smoothing_options(current_config),
+            zero_clamp=current_config['zero_clamp'],
+            needle_colors=current_config['needle_colors'],
+            needle_engine=current_config['needle_engine']
+        )
+        logger = None
+    else:
+        logger = create_logger(current_config)
+    
+    # Pipelined mode runs detection on worker processes (single gauge only)
+    pipeline = None
+    if current_config['workers'] > 0 and multi_reader is None:
+        pipeline = ProcessingPipeline(reader, workers=current_config['workers'], queue_size=current_config['queue_size'])
     
     def save_current_config():
         # Helper to save current state of reader
-        cfg = {
+        current_config.update({
             'min_angle': reader.min_angle,
             'max_angle': reader.max_angle,
             'min_psi': reader.min_val,
             'max_psi': reader.max_val,
-            'needle_color': reader.needle_color
-        }
-        config_manager.save_config(cfg)
+            'needle_color': reader.needle_color,
+            'track_circle': reader.track_circle,
+            'redetect_interval': reader.redetect_interval,
+            'pyramid_width': reader.pyramid_width
+        })
+        config_manager.save_config(current_config)
+
+    # Helper to change and save the profile of the gauge shown on the dashboard
+    def update_primary_profile(**values):
+        if primary_gauge is None:
+            print("Main: No gauge in view to update")
+            return
+        multi_reader.update_profile(primary_gauge, **values)
+        config_manager.save_gauge_profile(current_config, primary_gauge, multi_reader.profiles[primary_gauge])
 
     # Update Needle Color
     def on_config_change(new_color):
         print(f"Main: Updating needle color to {new_color}")
+        if multi_reader is not None:
+            update_primary_profile(needle_color=new_color)
+            return
         reader.needle_color = new_color
         save_current_config()
 
@@ -60,61 +229,184 @@ def run_live_demo():
         print(f"  Min Angle: {min_angle:.1f}, Max Angle: {max_angle:.1f}")
         print(f"  Min PSI: {min_psi}, Max PSI: {max_psi}")
         
+        # Update Dashboard Static Lines
+        dashboard.min_angle = min_angle
+        dashboard.max_angle = max_angle
+        dashboard.invalidate_overlay()
+        
+        if multi_reader is not None:
+            update_primary_profile(min_angle=min_angle, max_angle=max_angle, min_psi=min_psi, max_psi=max_psi)
+            return
+        
         # Update Reader
         reader.min_angle = min_angle
         reader.max_angle = max_angle
         reader.min_val = min_psi
         reader.max_val = max_psi
         
-        # Update Dashboard Static Lines
-        dashboard.min_angle = min_angle
-        dashboard.max_angle = max_angle
-        
         # Save to JSON
         save_current_config()
 
     def on_min_angle_update(min_angle):
         print(f"Main: Updating Min Angle to {min_angle:.1f}")
-        reader.min_angle = min_angle
         dashboard.min_angle = min_angle
+        dashboard.invalidate_overlay()
+        if multi_reader is not None:
+            if primary_gauge is not None:
+                multi_reader.update_profile(primary_gauge, min_angle=min_angle)
+            return
+        reader.min_angle = min_angle
 
     # Setup Webcam Feed and Dashboard
 
-    video_stream = ThreadedCamera(0).start()
+    video_stream = open_camera(current_config)
+    start_metrics(current_config)
     
     dashboard = Dashboard(
         config_callback=on_config_change, 
         calibration_callback=on_calibration_complete, 
         min_angle_callback=on_min_angle_update,
         min_angle=current_config['min_angle'],
-        max_angle=current_config['max_angle']
+        max_angle=current_config['max_angle'],
+        render_fps=current_config['render_fps'],
+        show_metrics=current_config['metrics_overlay']
     )
 
     print("Starting Live Feed... Close the dashboard window to quit.")
 
-    # Running Loop until program is closed or exited
-    while True:
-        ret, frame = video_stream.read()
+    stop_event = threading.Event()
+
+    # Processing runs at full rate on its own thread; the dashboard only
+    # renders the latest submitted result on its own timer
+    def process_frames():
+        nonlocal primary_gauge
+        last_seq = 0
+
+        while not stop_event.is_set():
+            # Wait for a frame we haven't processed yet
+            ret, frame, seq, frame_time = video_stream.read_new(last_seq, timeout=0.1)
+            if not ret:
+                # If no frame is ready yet or camera disconnected
+                continue
+            count_dropped(last_seq, seq)
+            last_seq = seq
+
+            if pipeline is not None:
+                # Hand new frames to the workers and collect finished ones in order
+                pipeline.submit(frame, seq, frame_time)
+                
+                for psi, processed_frame, raw_angle, result_seq, result_time, circle, tracked in pipeline.results():
+                    log_reading(logger, psi, raw_angle, result_seq, result_time, circle, tracked)
+                    dashboard.submit(processed_frame, psi, raw_angle)
+                continue
+            
+            if multi_reader is not None:
+                # Process frame, every gauge in view
+                readings, processed_frame = multi_reader.read_frame(frame)
+                
+                # Log Data, one file per gauge
+                for gauge_id, (gauge_psi, gauge_angle) in readings.items():
+                    if gauge_id not in gauge_loggers:
+                        gauge_loggers[gauge_id] = create_logger(current_config, name=f"telemetry_log_gauge{gauge_id}")
+                    log_reading(gauge_loggers[gauge_id], gauge_psi, gauge_angle, last_seq, frame_time,
+                                multi_reader.circles.get(gauge_id), multi_reader.tracked)
+                
+                # The dashboard follows the lowest numbered gauge in view
+                primary_gauge = min(readings) if readings else None
+                psi, raw_angle = readings.get(primary_gauge, (None, None))
+            else:
+                # Process frame
+                psi, processed_frame, raw_angle = reader.read_frame(frame, frame_time=frame_time)
+                
+                # Log Data
+                log_reading(logger, psi, raw_angle, last_seq, frame_time,
+                    reader.last_circle, reader.tracked)
+            
+            # Hand the result to the Dashboard
+            dashboard.submit(processed_frame, psi, raw_angle)
+
+    processing_thread = threading.Thread(target=process_frames, daemon=True)
+    processing_thread.start()
+
+    # Run the GUI event loop until the dashboard window is closed
+    dashboard.start_render_timer()
+    plt.show(block=True)
+
+    stop_event.set()
+    processing_thread.join(timeout=2)
+
+    video_stream.stop()
+    
+    if pipeline is not None:
+        pipeline.close()
+    
+    if multi_reader is not None:
+        # Keep the IDs of newly seen gauges for the next run
+        current_config['gauges'] = {str(k): v for k, v in multi_reader.profiles.items()}
+        config_manager.save_config(current_config)
+        multi_reader.close()
+    
+    # Write out any buffered readings
+    if logger is not None:
+        logger.close()
+    for gauge_logger in gauge_loggers.values():
+        gauge_logger.close()
+
+
+# Camera -> GaugeReader -> DataLogger without any GUI, for unattended devices.
+# Stops on Ctrl+C or SIGTERM.
+def run_headless():
+    config_manager = ConfigManager()
+    current_config = load_current_config(config_manager)
+    reader = create_reader(current_config)
+    logger = create_logger(current_config)
+
+    if current_config['multi_gauge']:
+        print("Multi-gauge mode is not available headless, reading the strongest gauge only.")
+
+    pipeline = None
+    if current_config['workers'] > 0:
+        pipeline = ProcessingPipeline(reader, workers=current_config['workers'], queue_size=current_config['queue_size'])
+
+    # Shutdown is requested by a signal instead of closing a window
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        print("Stopping...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    video_stream = open_camera(current_config)
+    start_metrics(current_config)
+    print("Running headless... Press Ctrl+C to quit.")
+
+    last_seq = 0
+    while not stop_event.is_set():
+        ret, frame, seq, frame_time = video_stream.read_new(last_seq, timeout=0.1)
         if not ret:
-            # If no frame is ready yet or camera disconnected
             continue
+        count_dropped(last_seq, seq)
+        last_seq = seq
 
-        # Process frame
-        psi, processed_frame, raw_angle = reader.read_frame(frame)
-        
-        # Log Data
-        if psi is not None:
-            logger.log(psi)
-        
-        # Update Dashboard
-        dashboard.update(processed_frame, psi, raw_angle)
-        
-        # Check if dashboard window is closed
-        if not plt.fignum_exists(dashboard.fig.number):
-            break
+        if pipeline is not None:
+            pipeline.submit(frame, seq, frame_time)
+            for psi, _, raw_angle, result_seq, result_time, circle, tracked in pipeline.results():
+                log_reading(logger, psi, raw_angle, result_seq, result_time, circle, tracked)
+            continue
+
+        # No overlays needed when nobody is watching
+        psi, _, raw_angle = reader.read_frame(frame, annotate=False, frame_time=frame_time)
+        log_reading(logger, psi, raw_angle, last_seq, frame_time,
+                    reader.last_circle, reader.tracked)
 
     video_stream.stop()
-    
+
+    if pipeline is not None:
+        pipeline.close()
+
+    logger.close()
 
 if __name__ == "__main__":
     # If you don't have a webcam right now, you can still test on an image:
@@ -125,4 +417,12 @@ if __name__ == "__main__":
     # psi, processed_img, angle = reader.read_frame(img)
     # print(f"Detected PSI: {psi}, Angle: {angle}")
 
-    run_live_demo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Optical Telemetry Bridge")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without the dashboard (no matplotlib), stop with Ctrl+C or SIGTERM")
+    args = parser.parse_args()
+
+    if args.headless:
+        run_headless()
+    else:
+        run_live_demo()
\ No newline at end of file
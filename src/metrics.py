@@ -0,0 +1,181 @@
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Low-overhead runtime metrics shared by all modules: stage timers feeding
+# rolling histograms, counters and event rates. Updating a metric costs about
+# a microsecond and takes no lock, so the hot loops can be instrumented
+# permanently. Read them through snapshot(), prometheus_text() or the HTTP
+# endpoint started with start_http_server().
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class RollingHistogram:
+    def __init__(self, size=1024):
+        """Keeps the last size samples for quantiles, plus an all-time count and sum."""
+        self.size = size
+        self.samples = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+
+        self.samples[self.count % self.size] = value
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs=QUANTILES):
+
+        n = min(self.count, self.size)
+        if n == 0:
+            return [float('nan')] * len(qs)
+        return [float(v) for v in np.quantile(self.samples[:n], qs)]
+
+class RateMeter:
+    def __init__(self, size=64, idle_timeout=2.0):
+        """Events per second over the last size events, 0 once nothing happened for idle_timeout seconds."""
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.times = np.zeros(size)
+        self.count = 0
+
+    def tick(self):
+
+        self.times[self.count % self.size] = time.perf_counter()
+        self.count += 1
+
+    def rate(self):
+
+        n = min(self.count, self.size)
+        if n < 2:
+            return 0.0
+        newest = self.times[(self.count - 1) % self.size]
+        oldest = self.times[self.count % self.size] if self.count > self.size else self.times[0]
+        if time.perf_counter() - newest > self.idle_timeout or newest <= oldest:
+            return 0.0
+        return (n - 1) / (newest - oldest)
+
+class Timer:
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class MetricsRegistry:
+    def __init__(self, prefix='gauge'):
+        self.prefix = prefix
+        self.histograms = {} # name -> RollingHistogram of durations in seconds
+        self.counters = {} # name -> running total
+        self.rates = {} # name -> RateMeter
+        self.lock = threading.Lock() # Only taken when a metric is created
+
+    # Record a duration (seconds) for a stage
+    def observe(self, name, seconds):
+
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, RollingHistogram())
+        histogram.observe(seconds)
+
+    # Time a block of code: with metrics.timer('read_frame'): ...
+    def timer(self, name):
+
+        return Timer(self, name)
+
+    def increment(self, name, amount=1):
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Count an event and track how often it happens per second (e.g. frames)
+    def tick(self, name):
+
+        meter = self.rates.get(name)
+        if meter is None:
+            with self.lock:
+                meter = self.rates.setdefault(name, RateMeter())
+        meter.tick()
+        self.increment(name)
+
+    def rate(self, name):
+
+        meter = self.rates.get(name)
+        return meter.rate() if meter is not None else 0.0
+
+    # Plain dict of everything, e.g. for an on-screen overlay or a status print
+    def snapshot(self):
+
+        with self.lock:
+            histograms = dict(self.histograms)
+            rates = dict(self.rates)
+        return {
+            'latency_ms': {name: [q * 1000 for q in h.quantiles()] for name, h in histograms.items()},
+            'counters': dict(self.counters),
+            'rates': {name: meter.rate() for name, meter in rates.items()}
+        }
+
+    # Prometheus text exposition format: stage timers as summaries, counters and rates as gauges
+    def prometheus_text(self):
+
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            rates = sorted(self.rates.items())
+        counters = sorted(self.counters.items())
+
+        lines = []
+        for name, histogram in histograms:
+            metric = f"{self.prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q, value in zip(QUANTILES, histogram.quantiles()):
+                lines.append(f'{metric}{{quantile="{q}"}} {value:.6g}')
+            lines.append(f"{metric}_sum {histogram.total:.6g}")
+            lines.append(f"{metric}_count {histogram.count}")
+
+        for name, value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        for name, meter in rates:
+            metric = f"{self.prefix}_{name}_per_second"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {meter.rate():.3f}")
+
+        return "\n".join(lines) + "\n"
+
+# The registry every module reports to
+metrics = MetricsRegistry()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Scrapes would otherwise be printed to the console
+    def log_message(self, format, *args):
+        pass
+
+# Serve the metrics at http://host:port/metrics on a background thread
+def start_http_server(port=9108, host='127.0.0.1', registry=metrics):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return server
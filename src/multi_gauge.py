@@ -0,0 +1,213 @@
+import cv2
+import time
+from concurrent.futures import ThreadPoolExecutor
+from gauge import GaugeReader
+from metrics import metrics
+
+class MultiGaugeReader:
+    def __init__(self, profiles=None, default_profile=None, max_gauges=6, max_workers=4,
+                 redetect_interval=30, pyramid_width=320, max_missed=3,
+                 smoothing='mean', smoothing_options=None, zero_clamp=1.2, needle_colors=None,
+                 needle_engine='hough'):
+        """
+        Read every gauge in the frame instead of only the strongest circle.
+
+        profiles maps gauge IDs to calibration dicts with the same keys as
+        config.json (min_angle, max_angle, min_psi, max_psi, needle_color).
+        A profile may also hold the gauge 'center' in pixels, which is used to
+        give a gauge the same ID again after a restart. Missing values come
+        from default_profile.
+
+        Gauge IDs stay stable across frames by matching each detected circle
+        to the nearest tracked one. The needle stage of every gauge runs on a
+        thread pool; OpenCV releases the GIL, so the gauges really are
+        processed in parallel. A gauge that is missing from max_missed full
+        detections in a row is forgotten (its smoothing history is reset).
+        Every gauge gets its own smoothing filter (see GaugeReader).
+        needle_colors holds custom needle color definitions, see
+        segmentation.py, and needle_engine picks the needle detector.
+        """
+        self.default_profile = dict(default_profile or {})
+        self.profiles = {int(gauge_id): dict(p) for gauge_id, p in (profiles or {}).items()}
+        self.max_gauges = max_gauges
+        self.redetect_interval = redetect_interval
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+        self.smoothing_options = smoothing_options
+        self.zero_clamp = zero_clamp
+        self.needle_colors = needle_colors
+        self.needle_engine = needle_engine
+
+        # Shared circle detector; gauges on a panel sit closer together than the
+        # single-gauge minimum center distance allows
+        self.detector = GaugeReader(0, 0, 0, 100, pyramid_width=pyramid_width)
+        self.detector.min_dist_ratio = 0.1
+
+        # Per-gauge state, keyed by gauge ID
+        self.readers = {}
+        self.circles = {}
+        self.missed = {}
+        self._support_baseline = {}
+        self._frames_since_detect = 0
+        self.tracked = False # Circles of the last frame were tracked, not searched for
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def read_frame(self, frame):
+        """
+        Process a single frame containing one or more gauges.
+        Returns a dict of gauge ID -> (PSI value, raw angle) for the gauges
+        seen in this frame, and the processed frame with overlays.
+        """
+
+        start = time.perf_counter()
+        metrics.tick('frames_processed')
+
+        output_img = frame.copy()
+        with metrics.timer('circle_detection'):
+            circles = self._locate_circles(frame)
+        metrics.increment('circles_found', len(circles))
+
+        # Needle detection for all gauges in parallel
+        futures = {
+            gauge_id: self.executor.submit(self.readers[gauge_id].find_needle_line, frame, circle)
+            for gauge_id, circle in circles.items()
+        }
+
+        readings = {}
+        for gauge_id, future in futures.items():
+            reader = self.readers[gauge_id]
+            cx, cy, r = circles[gauge_id]
+            needle_line = future.result()
+
+            cv2.circle(output_img, (cx, cy), r, (0, 255, 0), 3)
+            cv2.circle(output_img, (cx, cy), 5, (0, 0, 255), -1)
+
+            if needle_line:
+                x1, y1, x2, y2 = (int(round(v)) for v in needle_line)
+                cv2.line(output_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
+
+            psi_val, raw_angle = reader.reading(circles[gauge_id], needle_line)
+
+            label = f"#{gauge_id}: {psi_val} PSI" if psi_val is not None else f"#{gauge_id}"
+            cv2.putText(output_img, label, (cx - 60, cy + int(r/2)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+
+            readings[gauge_id] = (psi_val, raw_angle)
+
+        metrics.increment('readings', sum(psi is not None for psi, _ in readings.values()))
+        metrics.observe('read_frame', time.perf_counter() - start)
+        return readings, output_img
+
+    # Calibration profile for a gauge, with defaults filled in
+    def profile(self, gauge_id):
+
+        profile = dict(self.default_profile)
+        profile.update(self.profiles.get(gauge_id, {}))
+        return profile
+
+    # Change the calibration of one gauge (keys as in config.json)
+    def update_profile(self, gauge_id, **values):
+
+        self.profiles.setdefault(gauge_id, {}).update(values)
+        if gauge_id in self.readers:
+            self._apply_profile(self.readers[gauge_id], self.profile(gauge_id))
+
+    def close(self):
+
+        self.executor.shutdown(wait=True)
+
+    # Tracked circles for this frame, re-running detection when needed
+    def _locate_circles(self, frame):
+
+        self._frames_since_detect += 1
+        if self.circles and self._frames_since_detect < self.redetect_interval:
+            still_there = all(
+                self.detector._circle_support(frame, *circle) >=
+                self._support_baseline[gauge_id] * self.detector.track_support_ratio
+                for gauge_id, circle in self.circles.items()
+            )
+            if still_there:
+                self.tracked = True
+                return dict(self.circles)
+
+        self.tracked = False
+        self._frames_since_detect = 0
+        detected = self.detector._detect_circles(frame, self.max_gauges)
+        self._assign_ids(detected)
+
+        for gauge_id, circle in self.circles.items():
+            self._support_baseline[gauge_id] = self.detector._circle_support(frame, *circle)
+
+        return dict(self.circles)
+
+    # Match detected circles to known gauge IDs, creating new IDs for new gauges
+    def _assign_ids(self, detected):
+
+        previous = self.circles
+        self.circles = {}
+        unmatched = list(detected)
+
+        # 1. Gauges seen recently keep their ID, nearest pairs first
+        pairs = sorted(
+            (self._distance(circle, prev), gauge_id, circle)
+            for gauge_id, prev in previous.items()
+            for circle in unmatched
+        )
+        for dist, gauge_id, circle in pairs:
+            if gauge_id in self.circles or circle not in unmatched:
+                continue
+            if dist <= circle[2] * 0.5:
+                self.circles[gauge_id] = circle
+                unmatched.remove(circle)
+
+        # 2. Gauges that reappear near a saved profile center reuse that profile
+        for circle in list(unmatched):
+            candidates = [
+                (self._distance(circle, p['center']), gauge_id)
+                for gauge_id, p in self.profiles.items()
+                if 'center' in p and gauge_id not in self.circles
+            ]
+            if candidates:
+                dist, gauge_id = min(candidates)
+                if dist <= circle[2] * 0.5:
+                    self.circles[gauge_id] = circle
+                    unmatched.remove(circle)
+
+        # 3. Anything left is a new gauge
+        for circle in unmatched:
+            known = set(self.profiles) | set(self.readers) | set(self.circles)
+            gauge_id = max(known) + 1 if known else 0
+            self.profiles[gauge_id] = {'center': [circle[0], circle[1]]}
+            self.circles[gauge_id] = circle
+
+        # Create readers for new gauges, forget gauges missing for too long
+        for gauge_id in self.circles:
+            self.missed[gauge_id] = 0
+            if gauge_id not in self.readers:
+                reader = GaugeReader(0, 0, 0, 100, smoothing=self.smoothing,
+                                     smoothing_options=self.smoothing_options, zero_clamp=self.zero_clamp,
+                                     needle_colors=self.needle_colors, needle_engine=self.needle_engine)
+                self._apply_profile(reader, self.profile(gauge_id))
+                self.readers[gauge_id] = reader
+
+        for gauge_id in list(self.readers):
+            if gauge_id in self.circles:
+                continue
+            self.missed[gauge_id] = self.missed.get(gauge_id, 0) + 1
+            if self.missed[gauge_id] > self.max_missed:
+                del self.readers[gauge_id]
+                del self.missed[gauge_id]
+                self._support_baseline.pop(gauge_id, None)
+
+    def _apply_profile(self, reader, profile):
+
+        reader.min_angle = profile.get('min_angle', 0)
+        reader.max_angle = profile.get('max_angle', 0)
+        reader.min_val = profile.get('min_psi', 0)
+        reader.max_val = profile.get('max_psi', 100)
+        reader.needle_color = profile.get('needle_color', 'red')
+
+    def _distance(self, circle, center):
+
+        return ((circle[0] - center[0])**2 + (circle[1] - center[1])**2) ** 0.5
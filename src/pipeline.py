@@ -0,0 +1,179 @@
+import cv2
+import heapq
+import multiprocessing as mp
+import queue
+import time
+from gauge import GaugeReader
+from metrics import metrics
+
+# Worker process: runs circle and needle detection on frames from the task queue.
+# Only the geometry is sent back, the parent already holds the frame.
+def _worker_loop(reader_options, task_queue, result_queue):
+
+    # Parallelism comes from the process pool, avoid oversubscribing cores
+    cv2.setNumThreads(1)
+    reader = GaugeReader(0, 0, 0, 100, **reader_options)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            return
+
+        seq, frame, frame_time, needle_color = task
+        try:
+            reader.needle_color = needle_color
+            circle, needle_line = reader.detect(frame, frame_time)
+            result = (seq, circle, needle_line, reader.tracked, reader.skipped)
+        except Exception as e:
+            # Every seq must come back, or in-order release stalls behind it
+            print(f"Pipeline worker: error processing frame {seq}: {e}")
+            result = (seq, None, None, False, False)
+        result_queue.put(result)
+
+class ProcessingPipeline:
+    def __init__(self, reader, workers=2, queue_size=4, result_timeout=5.0):
+        """
+        Run GaugeReader detection on a pool of worker processes.
+
+        Frames passed to submit() go through a bounded task queue; when the
+        queue is full the oldest waiting frame is dropped so the pipeline
+        always works on recent frames. Results are reordered by frame
+        sequence before the calibration and smoothing filter of the
+        given (parent-side) reader are applied, so readings come out exactly
+        in capture order. Calibration changes made on reader take effect
+        immediately.
+
+        Circle tracking, motion gating and the latency budget of reader run
+        inside every worker, each on the frames it happens to get.
+
+        A worker that dies is restarted, and a frame with no result after
+        result_timeout seconds (lost with a crashed worker) is skipped, so
+        release never waits on it.
+        """
+        self.reader = reader
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_timeout = result_timeout
+
+        self.task_queue = mp.Queue(maxsize=queue_size)
+        self.result_queue = mp.Queue()
+
+        # Sequence bookkeeping for in-order release
+        self.next_seq = 0 # Sequence number for the next submitted frame
+        self.release_seq = 0 # Next sequence number to hand out
+        self.pending_frames = {} # seq -> (frame, camera seq, capture time, submit time) still being processed
+        self.ready = [] # Heap of finished (seq, circle, needle_line, tracked, skipped)
+        self.dropped = set()
+        self.dropped_count = 0
+
+        self.reader_options = {
+            'track_circle': reader.track_circle,
+            'redetect_interval': reader.redetect_interval,
+            'pyramid_width': reader.pyramid_width,
+            'latency_budget': reader.latency_budget,
+            'min_gauge_radius': reader.min_gauge_radius,
+            'motion_threshold': reader.motion_threshold,
+            'max_stale': reader.max_stale,
+            'needle_colors': reader.needle_colors,
+            'needle_engine': reader.needle_engine
+        }
+        self.processes = [self._start_worker() for _ in range(workers)]
+
+    # Queue a frame for processing, dropping the oldest waiting frame if full.
+    # A shared memory camera returns views into its ring slots, which the camera
+    # overwrites while the frame waits here (and in the task queue, which only
+    # pickles it on a feeder thread), so the pipeline keeps its own copy.
+    def submit(self, frame, frame_seq=0, frame_time=None):
+
+        frame = frame.copy()
+        seq = self.next_seq
+        self.next_seq += 1
+        self.pending_frames[seq] = (frame, frame_seq, frame_time, time.monotonic())
+
+        task = (seq, frame, frame_time, self.reader.needle_color)
+        while True:
+            try:
+                self.task_queue.put_nowait(task)
+                return seq
+            except queue.Full:
+                pass
+
+            try:
+                old_seq = self.task_queue.get_nowait()[0]
+            except queue.Empty:
+                continue # A worker just took one, retry
+            self.pending_frames.pop(old_seq, None)
+            self.dropped.add(old_seq)
+            self.dropped_count += 1
+            metrics.increment('frames_dropped')
+
+    # Finished readings in capture order as (psi, processed_frame, raw_angle,
+    # frame_seq, frame_time, circle, tracked); frame_seq and frame_time are
+    # the values passed to submit()
+    def results(self, timeout=0):
+
+        # Collect whatever the workers finished
+        block = timeout > 0
+        while True:
+            try:
+                item = self.result_queue.get(block, timeout)
+            except queue.Empty:
+                break
+            if item[0] >= self.release_seq: # Else it was already given up on
+                heapq.heappush(self.ready, item)
+            block = False
+
+        self._restart_dead_workers()
+
+        released = []
+        while True:
+            if self.release_seq in self.dropped:
+                self.dropped.discard(self.release_seq)
+                self.release_seq += 1
+            elif self.ready and self.ready[0][0] == self.release_seq:
+                seq, circle, needle_line, tracked, skipped = heapq.heappop(self.ready)
+                frame, frame_seq, frame_time, _ = self.pending_frames.pop(seq)
+                psi_val, output_img, raw_angle = self.reader.finish(frame, circle, needle_line, skipped)
+                released.append((psi_val, output_img, raw_angle, frame_seq, frame_time, circle, tracked))
+                self.release_seq += 1
+            elif self._is_lost(self.release_seq):
+                self.pending_frames.pop(self.release_seq)
+                self.dropped_count += 1
+                metrics.increment('frames_dropped')
+                self.release_seq += 1
+            else:
+                return released
+
+    # True when a submitted frame has waited longer than result_timeout for its result
+    def _is_lost(self, seq):
+
+        pending = self.pending_frames.get(seq)
+        return pending is not None and time.monotonic() - pending[3] > self.result_timeout
+
+    def _start_worker(self):
+
+        process = mp.Process(target=_worker_loop, args=(self.reader_options, self.task_queue, self.result_queue), daemon=True)
+        process.start()
+        return process
+
+    # Replace workers that crashed (e.g. killed by the OS), the frame they held times out
+    def _restart_dead_workers(self):
+
+        for i, process in enumerate(self.processes):
+            if not process.is_alive():
+                print(f"Pipeline: worker exited with code {process.exitcode}, restarting it")
+                self.processes[i] = self._start_worker()
+
+    # Stop the workers
+    def close(self):
+
+        for _ in self.processes:
+            try:
+                self.task_queue.put(None, timeout=1)
+            except queue.Full:
+                break
+
+        for process in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
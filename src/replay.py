@@ -0,0 +1,72 @@
+import argparse
+import time
+from data_manager import ConfigManager
+from binary_log import BinaryLogger
+from camera import VideoFileSource
+from main import create_logger, create_reader, load_current_config
+
+# Digitize a recorded gauge video as fast as the CPU allows
+def run_replay(video_path, output=None, every=1, config_file='config.json', report_interval=5.0):
+    config_manager = ConfigManager(config_file)
+    current_config = load_current_config(config_manager)
+    reader = create_reader(current_config)
+
+    # Readings are stamped with video time, not wall-clock time
+    logger = create_logger(current_config, output, name='replay_log')
+    source = VideoFileSource(video_path, every=every).start()
+
+    print(f"Replaying {video_path} ({source.frame_count} frames at {source.fps:.1f} FPS, every {source.every} frame(s))")
+
+    processed = 0
+    readings = 0
+    video_time = 0.0
+    start = time.perf_counter()
+    last_report = start
+
+    try:
+        for index, video_time, frame in source:
+            # Video time drives motion gating's forced re-reads, whatever the replay speed
+            psi, _, raw_angle = reader.read_frame(frame, annotate=False, frame_time=video_time)
+            processed += 1
+
+            if isinstance(logger, BinaryLogger):
+                # The binary log keeps every frame, with the frame index as sequence number
+                logger.log(psi, timestamp=video_time, seq=index, raw_angle=raw_angle,
+                           circle=reader.last_circle, tracked=reader.tracked)
+            elif psi is not None:
+                logger.log(psi, timestamp=video_time)
+
+            if psi is not None:
+                readings += 1
+
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                last_report = now
+                elapsed = now - start
+                print(f"  {index + 1}/{source.frame_count} frames, {processed / elapsed:.1f} FPS, "
+                      f"{video_time / elapsed:.2f}x real time")
+    except KeyboardInterrupt:
+        print("Replay interrupted.")
+    finally:
+        source.stop()
+        logger.close()
+
+    elapsed = time.perf_counter() - start
+    fps = processed / elapsed if elapsed > 0 else 0.0
+    realtime_factor = video_time / elapsed if elapsed > 0 else 0.0
+
+    print(f"Processed {processed} frames ({readings} readings) in {elapsed:.1f} s")
+    print(f"Throughput: {fps:.1f} FPS, {realtime_factor:.2f}x real time")
+    print(f"Readings written to {logger.log_file}")
+
+    return fps, realtime_factor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Digitize gauge readings from a recorded video file.")
+    parser.add_argument("video", help="Path to the video file")
+    parser.add_argument("-o", "--output", help="Log file for the readings (default: replay_log.csv, or .bin with the binary log format)")
+    parser.add_argument("-n", "--every", type=int, default=1, help="Process every Nth frame (default: 1)")
+    parser.add_argument("-c", "--config", default="config.json", help="Calibration file (default: config.json)")
+    args = parser.parse_args()
+
+    run_replay(args.video, output=args.output, every=args.every, config_file=args.config)
@@ -0,0 +1,171 @@
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+class LogRotator:
+    def __init__(self, log_file, max_bytes=0, interval=0, compress=True):
+        """
+        Split a log into numbered segments for continuous operation.
+
+        log_file is the base name: telemetry_log.csv is written as
+        telemetry_log.0001.csv, telemetry_log.0002.csv, ... A new segment is
+        started once the current one reaches max_bytes or has been open for
+        interval seconds (0 disables either limit). Closed segments are
+        gzipped on a background thread so the logging loop never waits for
+        compression.
+
+        The segments are listed in order in telemetry_log.manifest.json. A
+        restart continues the numbering instead of overwriting earlier data,
+        and segments left uncompressed by a crash are compressed then.
+        """
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.compress = compress
+
+        self.manifest_file = manifest_path(log_file)
+        self.directory = os.path.dirname(os.path.abspath(log_file))
+        self.stem, self.ext = os.path.splitext(os.path.basename(log_file))
+
+        # The manifest is also updated from the compression thread
+        self.lock = threading.Lock()
+        self.manifest = load_manifest(log_file)
+        self.segment = None
+        self.segment_start = 0.0
+
+        self.pending = queue.Queue()
+        self.compress_thread = None
+        if compress:
+            self.compress_thread = threading.Thread(target=self._compress_segments, daemon=True)
+            self.compress_thread.start()
+
+        # Segments of a previous run that never got closed or compressed
+        for entry in self.manifest['segments']:
+            if entry['closed'] is None:
+                entry['closed'] = time.time()
+            if compress and not entry['file'].endswith('.gz'):
+                self.pending.put(entry)
+        self._save_manifest()
+
+    # Create the next segment and return its path
+    def start_segment(self):
+
+        with self.lock:
+            segments = self.manifest['segments']
+            index = segments[-1]['index'] + 1 if segments else 1
+            self.segment = {
+                'index': index,
+                'file': f"{self.stem}.{index:04d}{self.ext}",
+                'opened': time.time(),
+                'closed': None
+            }
+            segments.append(self.segment)
+            self._save_manifest()
+
+        self.segment_start = time.time()
+        return os.path.join(self.directory, self.segment['file'])
+
+    # True when the current segment (size bytes so far) should be closed
+    def should_rotate(self, size):
+
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        return bool(self.interval) and time.time() - self.segment_start >= self.interval
+
+    # Mark the current segment as complete and queue it for compression.
+    # The caller must have closed its file first.
+    def finish_segment(self):
+
+        if self.segment is None:
+            return
+
+        with self.lock:
+            self.segment['closed'] = time.time()
+            self._save_manifest()
+
+        if self.compress:
+            self.pending.put(self.segment)
+        self.segment = None
+
+    # Wait until all closed segments are compressed
+    def close(self):
+
+        if self.compress_thread is not None:
+            self.pending.put(None)
+            self.compress_thread.join()
+            self.compress_thread = None
+
+    # Background thread: gzip closed segments one by one
+    def _compress_segments(self):
+
+        while True:
+            entry = self.pending.get()
+            if entry is None:
+                return
+
+            path = os.path.join(self.directory, entry['file'])
+            try:
+                if os.path.exists(path):
+                    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb', compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst)
+            except Exception as e:
+                print(f"Error compressing log segment: {e}")
+                continue
+
+            # Publish the compressed file before removing the original, so a
+            # reader following the manifest always finds one of the two
+            with self.lock:
+                entry['file'] += '.gz'
+                self._save_manifest()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _save_manifest(self):
+
+        try:
+            tmp_file = self.manifest_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.manifest, f, indent=4)
+            os.replace(tmp_file, self.manifest_file) # Readers never see a half written manifest
+        except Exception as e:
+            print(f"Error saving log manifest: {e}")
+
+# Manifest file belonging to a rotated log
+def manifest_path(log_file):
+    return os.path.splitext(log_file)[0] + '.manifest.json'
+
+# Manifest contents, an empty segment list if there is none yet
+def load_manifest(log_file):
+    path = manifest_path(log_file)
+    if not os.path.exists(path):
+        return {'segments': []}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# (manifest entry, path) of all segments of a rotated log, oldest first
+def list_segments(log_file):
+    directory = os.path.dirname(os.path.abspath(log_file))
+    segments = []
+    for entry in load_manifest(log_file)['segments']:
+        path = os.path.join(directory, entry['file'])
+        # The segment may have been compressed since the manifest was read
+        if not os.path.exists(path) and os.path.exists(path + '.gz'):
+            path += '.gz'
+        segments.append((entry, path))
+    return segments
+
+# Paths of all segments of a rotated log, oldest first
+def segment_paths(log_file):
+    return [path for _, path in list_segments(log_file)]
+
+# Open a segment for reading, compressed or not
+def open_segment(path, mode='rb'):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    return open(path, mode)
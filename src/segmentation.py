@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+# Needle color definitions: lists of [lower, upper] ranges, inclusive, in
+# HSV (OpenCV scale, hue 0-180), BGR or grayscale. A pixel belongs to the
+# needle if it falls in any of the ranges. Custom colors in config.json
+# ("needle_colors") use the same format and may override these presets.
+COLOR_PRESETS = {
+    'red': {'hsv': [[[0, 100, 100], [10, 255, 255]], [[170, 100, 100], [180, 255, 255]]]},
+    'black': {'gray': [[0, 80]]},
+    'blue': {'hsv': [[[100, 150, 50], [140, 255, 255]]]},
+    'yellow': {'hsv': [[[20, 100, 100], [35, 255, 255]]]},
+    'white': {'hsv': [[[0, 0, 200], [180, 40, 255]]]} # Needs a dark dial face
+}
+
+COLOR_SPACES = ('hsv', 'bgr', 'gray')
+
+# Conversion from BGR into each color space, None when the frame is used as is
+_CONVERSIONS = {'hsv': cv2.COLOR_BGR2HSV, 'bgr': None, 'gray': cv2.COLOR_BGR2GRAY}
+
+class ColorSegmenter:
+    def __init__(self, color):
+        """
+        Compile a needle color definition (see COLOR_PRESETS) once, so
+        segmenting a frame needs no per-frame threshold arrays.
+
+        The ROI is converted once per color space the definition uses and
+        every range is one inRange call, OR-ed together when there are
+        several. inRange compares exactly, so a range gives the same mask as
+        thresholding by hand. Gray-only colors with several ranges use a 256
+        entry table on the grayscale image instead.
+        Output buffers are kept and reused while the ROI size stays the same.
+        """
+        unknown = set(color) - set(COLOR_SPACES)
+        if unknown or not color:
+            raise ValueError(f"Needle color ranges must be given as {', '.join(COLOR_SPACES)} (got {sorted(color)})")
+
+        self.color = color
+        self.spaces = [space for space in COLOR_SPACES if space in color]
+        self.ranges = [
+            (space, np.atleast_1d(np.array(lower)), np.atleast_1d(np.array(upper)))
+            for space in self.spaces
+            for lower, upper in color[space]
+        ]
+        self.table = None
+        if self.spaces == ['gray'] and len(self.ranges) > 1:
+            self.table = self._compile_gray(color)
+
+        # Does pure black match? Then pixels blacked out around the gauge must be masked again.
+        self._shape = None
+        self.matches_black = bool(self.segment(np.zeros((1, 1, 3), dtype=np.uint8))[0, 0])
+
+    def segment(self, roi, mask=None):
+        """
+        Binary mask (0 or 255) of the needle colored pixels in a BGR image,
+        restricted to mask if given. The returned array is overwritten by
+        the next call.
+        """
+        self._buffers(roi.shape[:2])
+
+        converted = {}
+        for space in self.spaces:
+            code = _CONVERSIONS[space]
+            converted[space] = roi if code is None else cv2.cvtColor(roi, code, dst=self._converted[space])
+
+        if self.table is not None:
+            cv2.LUT(converted['gray'], self.table, dst=self._out)
+        else:
+            space, lower, upper = self.ranges[0]
+            cv2.inRange(converted[space], lower, upper, dst=self._out)
+            for space, lower, upper in self.ranges[1:]:
+                cv2.inRange(converted[space], lower, upper, dst=self._range)
+                cv2.bitwise_or(self._out, self._range, dst=self._out)
+
+        if mask is not None and self.matches_black:
+            cv2.bitwise_and(self._out, mask, dst=self._out)
+        return self._out
+
+    # (Re)allocate the per-frame buffers when the ROI size changes
+    def _buffers(self, shape):
+
+        if shape == self._shape:
+            return
+
+        self._shape = shape
+        self._out = np.empty(shape, dtype=np.uint8)
+        self._range = np.empty(shape, dtype=np.uint8)
+        self._converted = {
+            space: np.empty(shape if space == 'gray' else shape + (3,), dtype=np.uint8)
+            for space in self.spaces if _CONVERSIONS[space] is not None
+        }
+
+    def _compile_gray(self, color):
+
+        levels = np.arange(256)
+        table = np.zeros(256, dtype=np.uint8)
+        for lower, upper in color['gray']:
+            table[(levels >= lower) & (levels <= upper)] = 255
+        return table
+
+# Build the segmenter for a needle color by name. needle_colors holds custom
+# definitions (from config.json), which take precedence over the presets.
+def create_segmenter(name, needle_colors=None):
+    colors = dict(COLOR_PRESETS, **(needle_colors or {}))
+    if name not in colors:
+        raise ValueError(f"Unknown needle color: {name} (choose from {', '.join(colors)})")
+    return ColorSegmenter(colors[name])
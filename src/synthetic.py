@@ -0,0 +1,139 @@
+import cv2
+import numpy as np
+
+# Needle colors in BGR, chosen to pass GaugeReader's thresholds for each needle_color
+NEEDLE_COLORS = {
+    'red': (20, 20, 210),
+    'black': (25, 25, 25),
+    'blue': (200, 60, 0),
+    'yellow': (20, 210, 230)
+}
+
+# Calibration of every synthetic gauge: 0 at the lower left, 100 at the lower right
+MIN_ANGLE = 225
+MAX_ANGLE = -45
+MIN_PSI = 0
+MAX_PSI = 100
+
+def render_gauge(angle, height=720, width=1280, center=None, radius=None, needle_color='red',
+                 face_text=True, clutter=0, blur=0.0, noise=0.0, glare=0.0, rng=None):
+    """
+    Draw a pressure gauge with the needle at a known angle (degrees,
+    counter-clockwise from the positive x axis, the convention of
+    calculate_angle). The dial spans MIN_ANGLE..MAX_ANGLE clockwise.
+
+    center and radius default to the middle of the frame and 40% of its
+    height. face_text draws the scale numbers and unit, clutter adds that
+    many short stray line segments in the needle color (printing,
+    reflections). blur is a Gaussian sigma in pixels, noise the standard
+    deviation of additive pixel noise and glare the strength (0-1) of a
+    bright reflection on the glass.
+
+    Returns the BGR frame and its label: dict with angle, center, radius
+    and needle_color.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    # Pixel noise comes from OpenCV's (much faster) generator, seeded from rng
+    cv2.setRNGSeed(int(rng.integers(2**31)))
+    cx, cy = center if center is not None else (width // 2, height // 2)
+    r = radius if radius is not None else int(height * 0.4)
+    color = NEEDLE_COLORS[needle_color]
+
+    # Background: smooth gray gradient with some texture
+    background = np.empty((height, width), dtype=np.int16)
+    cv2.randn(background, 0, 6)
+    background += np.linspace(rng.uniform(50, 120), rng.uniform(50, 120), width).astype(np.int16)
+    frame = cv2.cvtColor(np.clip(background, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+    # Bezel and face
+    face = tuple(int(v) for v in rng.uniform(225, 250, 3))
+    cv2.circle(frame, (cx, cy), r + max(3, r // 12), (70, 70, 75), -1, cv2.LINE_AA)
+    cv2.circle(frame, (cx, cy), r, face, -1, cv2.LINE_AA)
+    cv2.circle(frame, (cx, cy), r, (40, 40, 40), max(2, r // 60), cv2.LINE_AA)
+
+    # Scale: major ticks every 10%, minor ticks in between
+    sweep = (MIN_ANGLE - MAX_ANGLE) % 360
+    for i in range(51):
+        tick = np.radians(MIN_ANGLE - sweep * i / 50)
+        inner = 0.80 if i % 5 == 0 else 0.86
+        p1 = (int(cx + r * inner * np.cos(tick)), int(cy - r * inner * np.sin(tick)))
+        p2 = (int(cx + r * 0.92 * np.cos(tick)), int(cy - r * 0.92 * np.sin(tick)))
+        cv2.line(frame, p1, p2, (30, 30, 30), 2 if i % 5 == 0 else 1, cv2.LINE_AA)
+
+        if face_text and i % 10 == 0:
+            label = str(MIN_PSI + (MAX_PSI - MIN_PSI) * i // 50)
+            scale = r / 250
+            (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+            tx = int(cx + r * 0.66 * np.cos(tick) - tw / 2)
+            ty = int(cy - r * 0.66 * np.sin(tick) + th / 2)
+            cv2.putText(frame, label, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, scale, (30, 30, 30), 2, cv2.LINE_AA)
+
+    if face_text:
+        scale = r / 200
+        (tw, th), _ = cv2.getTextSize("PSI", cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+        cv2.putText(frame, "PSI", (cx - tw // 2, cy + r // 3), cv2.FONT_HERSHEY_SIMPLEX, scale, (30, 30, 30), 2, cv2.LINE_AA)
+
+    for _ in range(clutter):
+        x, y = rng.uniform(-0.7, 0.7, 2) * r
+        dx, dy = rng.uniform(-0.15, 0.15, 2) * r
+        cv2.line(frame, (int(cx + x), int(cy + y)), (int(cx + x + dx), int(cy + y + dy)), color, 2, cv2.LINE_AA)
+
+    # Needle: tapered from a short tail behind the hub to the tip
+    theta = np.radians(angle)
+    direction = np.array([np.cos(theta), -np.sin(theta)])
+    normal = np.array([direction[1], -direction[0]])
+    half_width = max(2.0, r / 45)
+    base = np.array([cx, cy], dtype=np.float64)
+    needle = np.array([
+        base - direction * r * 0.15 + normal * half_width,
+        base + direction * r * 0.85,
+        base - direction * r * 0.15 - normal * half_width
+    ])
+    cv2.fillPoly(frame, [np.round(needle).astype(np.int32)], color, cv2.LINE_AA)
+    cv2.circle(frame, (cx, cy), max(4, r // 14), (40, 40, 40), -1, cv2.LINE_AA)
+
+    if glare > 0:
+        # Soft bright ellipse on the upper part of the glass, blended inside the dial's box only
+        x0, y0 = max(cx - r, 0), max(cy - r, 0)
+        x1, y1 = min(cx + r + 1, width), min(cy + r + 1, height)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+        gx = int(cx - x0 + rng.uniform(-0.4, 0.4) * r)
+        gy = int(cy - y0 - rng.uniform(0.2, 0.6) * r)
+        axes = (int(r * rng.uniform(0.3, 0.6)), int(r * rng.uniform(0.1, 0.25)))
+        cv2.ellipse(mask, (gx, gy), axes, rng.uniform(-30, 30), 0, 360, 1.0, -1)
+        mask = (cv2.GaussianBlur(mask, (0, 0), max(1.0, r / 15)) * glare)[..., None]
+        box = frame[y0:y1, x0:x1]
+        box[:] = (box * (1 - mask) + 255 * mask).astype(np.uint8)
+
+    if blur > 0:
+        frame = cv2.GaussianBlur(frame, (0, 0), blur)
+
+    if noise > 0:
+        pixel_noise = np.empty(frame.shape, dtype=np.int16)
+        cv2.randn(pixel_noise, 0, noise)
+        pixel_noise += frame
+        frame = np.clip(pixel_noise, 0, 255).astype(np.uint8)
+
+    label = {'angle': float(angle % 360), 'center': (cx, cy), 'radius': r, 'needle_color': needle_color}
+    return frame, label
+
+def random_gauge(rng, height=720, width=1280, needle_colors=('red', 'black', 'blue')):
+    """
+    render_gauge() with randomly drawn needle angle (within the dial),
+    needle color, dial size, position, face text, blur, noise and glare.
+    """
+    r = int(height * rng.uniform(0.2, 0.45))
+    margin = r + r // 12 + 2
+    center = (int(rng.integers(margin, width - margin)), int(rng.integers(margin, height - margin)))
+    sweep = (MIN_ANGLE - MAX_ANGLE) % 360
+    angle = MIN_ANGLE - rng.uniform(0, sweep)
+
+    return render_gauge(
+        angle, height, width, center=center, radius=r,
+        needle_color=str(rng.choice(needle_colors)),
+        face_text=bool(rng.random() < 0.8),
+        blur=float(rng.choice([0.0, rng.uniform(0.5, 2.0)])),
+        noise=float(rng.uniform(0, 8)),
+        glare=float(rng.choice([0.0, rng.uniform(0.2, 0.6)])),
+        rng=rng
+    )
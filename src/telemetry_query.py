@@ -0,0 +1,259 @@
+import json
+import os
+import numpy as np
+from rotation import list_segments, open_segment
+
+class TelemetryLog:
+    def __init__(self, log_file='telemetry_log.csv', index_interval=60.0, block_size=4096):
+        """
+        Time-indexed read access to a DataLogger CSV log (single file or
+        rotated segments).
+
+        Each segment is scanned once in block_size chunks and the byte offset
+        of a row is remembered about every index_interval seconds of log
+        time. Only the first row of each chunk is parsed, so building the
+        index costs little more than reading the file. Range queries then
+        seek straight to the nearest indexed row and read only the bytes that
+        cover the requested time range.
+
+        The index of every closed segment of a rotated log is saved next to
+        the manifest (telemetry_log.index.json), so opening the log again
+        only scans the segments that were added since. Saved entries are
+        matched on the segment number and its opening time in the manifest,
+        a segment that was replaced (e.g. the log was deleted and started
+        over) is scanned again. Timestamps must keep
+        increasing from one segment to the next, which DataLogger ensures by
+        writing epoch time when rotating. Uncompressed segments are seeked
+        directly; gzipped ones have to be decompressed up to the offset.
+        """
+        self.log_file = log_file
+        self.index_interval = index_interval
+        self.block_size = block_size
+        self.index_file = index_path(log_file)
+
+        # Per segment: (path, indexed timestamps, their byte offsets, last timestamp, file size)
+        self.segments = []
+        saved = self._load_index()
+        indexed = {}
+        for entry, path in list_segments(log_file) or [(None, log_file)]:
+            key = None if entry is None else str(entry['index'])
+            opened, index = saved.get(key, (None, None))
+            if index is None or opened != entry['opened']:
+                index = self._index_segment(path)
+
+            # Only closed segments are final, the open one is still growing
+            if index is not None and entry is not None and entry['closed'] is not None:
+                indexed[key] = (entry['opened'], index)
+            if index is not None:
+                self.segments.append((path,) + index)
+
+        # Rewrite the saved index when closed segments were added, replaced or removed
+        saved_opened = {key: opened for key, (opened, _) in saved.items()}
+        if {key: opened for key, (opened, _) in indexed.items()} != saved_opened:
+            self._save_index(indexed)
+
+    # Rows with start <= timestamp < end as arrays (timestamps, psi values)
+    def query(self, start=None, end=None):
+
+        times = []
+        values = []
+        for path, index_times, offsets, last_time, size in self.segments:
+            if end is not None and index_times[0] >= end:
+                continue
+            if start is not None and last_time < start:
+                continue
+
+            # Indexed row at or before start, and the first indexed row at or after end
+            first = 0 if start is None else max(np.searchsorted(index_times, start, side='right') - 1, 0)
+            last = len(offsets) if end is None else np.searchsorted(index_times, end, side='left')
+            stop = offsets[last] if last < len(offsets) else size
+
+            with open_segment(path) as f:
+                f.seek(offsets[first])
+                data = f.read(stop - offsets[first])
+
+            rows = self._parse(data)
+            mask = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                mask &= rows[:, 0] >= start
+            if end is not None:
+                mask &= rows[:, 0] < end
+            times.append(rows[mask, 0])
+            values.append(rows[mask, 1])
+
+        if not times:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(times), np.concatenate(values)
+
+    # Min/max/mean per time bucket, see downsample_buckets()
+    def downsample(self, start=None, end=None, buckets=1000):
+
+        return downsample_buckets(*self.query(start, end), buckets)
+
+    # At most points rows picked with Largest-Triangle-Three-Buckets
+    def decimate(self, start=None, end=None, points=2000):
+
+        return lttb(*self.query(start, end), points)
+
+    # Saved (opened, segment index) by segment number, empty if missing or built with another interval
+    def _load_index(self):
+
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r') as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"Error loading log index: {e}")
+            return {}
+
+        if saved.get('index_interval') != self.index_interval:
+            return {}
+        return {
+            key: (segment.get('opened'),
+                  (np.array(segment['times']), np.array(segment['offsets'], dtype=np.int64),
+                   segment['last_time'], segment['size']))
+            for key, segment in saved['segments'].items()
+        }
+
+    def _save_index(self, indexed):
+
+        saved = {
+            'index_interval': self.index_interval,
+            'segments': {
+                key: {'opened': opened, 'times': index_times.tolist(), 'offsets': offsets.tolist(),
+                      'last_time': last_time, 'size': size}
+                for key, (opened, (index_times, offsets, last_time, size)) in indexed.items()
+            }
+        }
+        try:
+            tmp_file = self.index_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(saved, f)
+            os.replace(tmp_file, self.index_file)
+        except Exception as e:
+            print(f"Error saving log index: {e}")
+
+    # Scan one segment and collect (timestamp, offset) pairs every index_interval seconds
+    def _index_segment(self, path):
+
+        index_times = []
+        offsets = []
+
+        with open_segment(path) as f:
+            f.readline() # Header row
+            offset = f.tell()
+            at_row_start = True # The next block starts with a new row
+            tail = b'' # Last two blocks, to find the final row
+
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+
+                # Only the first complete row in the block is parsed
+                row_start = 0 if at_row_start else block.find(b'\n') + 1
+                row_end = block.find(b'\n', row_start) if at_row_start or row_start > 0 else -1
+                if row_end > row_start:
+                    row_time = self._row_time(block[row_start:row_end])
+                    if row_time is not None and (not index_times or row_time >= index_times[-1] + self.index_interval):
+                        index_times.append(row_time)
+                        offsets.append(offset + row_start)
+
+                at_row_start = block.endswith(b'\n')
+                tail = (tail + block)[-2 * self.block_size:]
+                offset += len(block)
+
+            size = offset
+
+        if not offsets:
+            return None
+
+        last_time = self._row_time(tail.rstrip(b'\n').rsplit(b'\n', 1)[-1])
+        if last_time is None:
+            last_time = index_times[-1]
+        return np.array(index_times), np.array(offsets, dtype=np.int64), last_time, size
+
+    def _row_time(self, line):
+
+        try:
+            return float(line.split(b',', 1)[0])
+        except ValueError:
+            return None
+
+    # Parse "timestamp,psi" rows into an (n, 2) array, skipping a trailing partial row
+    def _parse(self, data):
+
+        data = data[:data.rfind(b'\n') + 1]
+        values = np.array(data.replace(b',', b' ').split(), dtype=np.float64)
+        return values[:len(values) // 2 * 2].reshape(-1, 2)
+
+# Saved sparse index of a rotated log, kept next to its manifest
+def index_path(log_file):
+    return os.path.splitext(log_file)[0] + '.index.json'
+
+def downsample_buckets(times, values, buckets=1000):
+    """
+    Split the time range into equal width buckets and reduce each to its
+    min, max and mean (a plot drawn from min/max keeps every spike).
+    Returns arrays (bucket center times, mins, maxs, means); empty buckets
+    are left out.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty, empty
+
+    edges = np.linspace(times[0], times[-1], buckets + 1)
+    starts = np.searchsorted(times, edges[:-1], side='left')
+    counts = np.diff(np.append(starts, len(times)))
+
+    filled = counts > 0
+    starts = starts[filled]
+    counts = counts[filled]
+
+    mins = np.minimum.reduceat(values, starts)
+    maxs = np.maximum.reduceat(values, starts)
+    means = np.add.reduceat(values, starts) / counts
+    centers = ((edges[:-1] + edges[1:]) / 2)[filled]
+    return centers, mins, maxs, means
+
+def lttb(times, values, points=2000):
+    """
+    Largest-Triangle-Three-Buckets decimation: keeps the first and last row
+    and from every bucket in between the row that forms the largest
+    triangle with the previous pick and the next bucket's average. Returns
+    arrays (times, values) of at most points rows that keep the visual
+    shape of the series.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(times)
+    if points >= n or points < 3:
+        return times, values
+
+    # Bucket boundaries for everything except the first and last row
+    bounds = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    picked = np.empty(points, dtype=np.intp)
+    picked[0] = 0
+    picked[-1] = n - 1
+
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+
+        # Average of the next bucket (the last row for the final bucket)
+        next_lo, next_hi = hi, bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_t = times[next_lo:next_hi].mean()
+        avg_v = values[next_lo:next_hi].mean()
+
+        # Twice the triangle areas for all candidates in this bucket
+        areas = np.abs(
+            (times[previous] - avg_t) * (values[lo:hi] - values[previous]) -
+            (times[previous] - times[lo:hi]) * (avg_v - values[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        picked[i + 1] = previous
+
+    return times[picked], values[picked]